@@ -3,6 +3,10 @@ ASGI config for ExpenseTracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn ExpenseTracker.asgi:application``)
+to enable the Server-Sent Events market stream at /api/market-data/stream/
+and the async read APIs in accounts/async_views.py (see ASGI_URLCONF).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
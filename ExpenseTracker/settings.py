@@ -47,23 +47,49 @@ INSTALLED_APPS = [
 
 # REST Framework settings
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    # Authorization: Rider <token> from the login API; requests without it stay anonymous
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'accounts.rider_tokens.RiderTokenAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # orjson-backed JSON when `pip install orjson` is done, the stock classes' behaviour otherwise.
+    # Use rest_framework.renderers.JSONRenderer / rest_framework.parsers.JSONParser to switch it off.
+    # application/msgpack is offered when `pip install msgpack` is done.
+    'DEFAULT_RENDERER_CLASSES': [
+        'accounts.renderers.FastJSONRenderer',
+        'accounts.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'accounts.renderers.FastJSONParser',
+        'accounts.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'accounts.renderers.AvailableContentNegotiation',
 }
 
+# The Page* classes are the stock session/CSRF/auth/messages/X-Frame-Options middleware,
+# skipped for /api/ requests (accounts/middleware.py); pages and admin get the full stack
 MIDDLEWARE = [
+    'accounts.middleware.ASGIURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'accounts.middleware.PageSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.PageCsrfViewMiddleware',
+    'accounts.middleware.PageAuthenticationMiddleware',
+    'accounts.middleware.PageMessageMiddleware',
+    'accounts.middleware.PageXFrameOptionsMiddleware',
 ]
+LEAN_API_PREFIX = '/api/'
+API_SESSION_PATHS = ['/api/riders/provision/']  # API views authenticated by the admin session
 
 ROOT_URLCONF = 'ExpenseTracker.urls'
+# Under an ASGI server the read APIs in it are served by async views (ASGIURLConfMiddleware);
+# None serves the same sync views as WSGI
+ASGI_URLCONF = 'accounts.async_urls'
 
 TEMPLATES = [
     {
@@ -103,6 +129,51 @@ DATABASES = {
 
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Point this at Redis or Memcached in production so every worker shares the rider cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# rider_id -> user resolver (accounts/rider_cache.py)
+RIDER_CACHE_TIMEOUT = 300  # seconds in the shared cache
+RIDER_CACHE_LOCAL_SIZE = 1024  # entries in each process's LRU
+RIDER_CACHE_LOCAL_TTL = 5  # seconds; bounds staleness in other processes after a change
+
+# Signed rider tokens issued at login (accounts/rider_tokens.py)
+RIDER_TOKEN_TTL = 7 * 24 * 3600  # seconds a token stays valid
+
+# NSE market data proxy (accounts/market_data.py)
+MARKET_DATA_URL = 'https://www.nseindia.com/api/allIndices'
+MARKET_DATA_TTL = 30  # seconds a fetched payload is served as fresh
+MARKET_DATA_STALE_TTL = 300  # further seconds it is served while refreshing in the background
+MARKET_DATA_ERROR_TTL = 15  # seconds a failed fetch is remembered before retrying
+MARKET_DATA_TIMEOUT = 5  # seconds per upstream request
+MARKET_DATA_WAIT_BUDGET = 2  # seconds a request waits for it before getting the last good / "Unavailable" payload
+MARKET_DATA_FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit (no upstream calls)
+MARKET_DATA_RESET_TIMEOUT = 60  # seconds the circuit stays open before one probe call is let through
+MARKET_STREAM_INTERVAL = 15  # seconds between polls of the cache while SSE clients are connected
+MARKET_STREAM_MAX_DURATION = 300  # seconds before a stream is closed and the browser reconnects
+PROVISION_HASH_WORKERS = None  # processes hashing passwords for bulk provisioning (None: one per CPU)
+
+# Password hashing off the request threads (accounts/password_pool.py).
+# The pooled hasher writes the same pbkdf2_sha256 hashes as Django's, so it takes its place in the list.
+PASSWORD_HASHERS = [
+    'accounts.password_pool.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_WORKERS = 2  # processes per web worker doing all hashing (0: hash inline in the request)
+PASSWORD_HASH_MAX_QUEUE = 16  # hashes waiting for a process before further requests get 503
+PASSWORD_HASH_RETRY_AFTER = 2  # seconds, sent as Retry-After with that 503
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,14 @@
+from django.urls import include, path
+
+from .async_views import dashboard_data, funds_list_api, market_data_api, portfolio_summary_api, recent_transactions
+
+# ASGI_URLCONF: the async views take these paths under an ASGI server; everything else
+# (and every path under WSGI) resolves through the regular ROOT_URLCONF below
+urlpatterns = [
+    path('api/dashboard/', dashboard_data, name='api-dashboard'),
+    path('api/transactions/recent/', recent_transactions, name='api-recent-transactions'),
+    path('api/funds/', funds_list_api, name='api-funds-list'),
+    path('api/portfolio/summary/', portfolio_summary_api, name='api-portfolio-summary'),
+    path('api/market-data/', market_data_api, name='api-market-data'),
+    path('', include('ExpenseTracker.urls')),
+]
@@ -0,0 +1,160 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAcceptable
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .market_data import market_data_cache
+from .models import Income, Expense, MutualFund, RiderBalance
+from .renderers import AvailableContentNegotiation, FastJSONRenderer, MessagePackRenderer, wants_native_types
+from .rider_tokens import RiderTokenAuthentication, authenticate_rider_request
+from .serializers import fast_expense_list, fast_income_list, fast_mutual_fund_list
+from .views import (
+    RECENT_TRANSACTION_FIELDS, _balance_payload, _first_balance, _merge_transactions, _portfolio_summary,
+    _portfolio_totals, _recent_columns, _recent_ledger, get_request_user, mark_rider_data, request_rider_id,
+    requested_fields, rider_data_etag,
+)
+
+
+# Async twins of the read-heavy GET APIs in views.py, routed in under ASGI (ASGI_URLCONF).
+# Same paths, bodies, status codes, ETags and media types as the DRF views (which have no
+# async support), built from the same helpers. On Django 4.2 the async ORM still runs each
+# query in a thread (sync_to_async); what is truly threadless is the wait on NSE (httpx), so
+# a burst of market data misses no longer pins the worker threads. Only JSON and msgpack are
+# offered, not the browsable API.
+RENDERERS = [FastJSONRenderer(), MessagePackRenderer()]
+
+
+class _Reply(Exception):
+    """Ends a view early with this status and body, as a DRF error response would."""
+
+    def __init__(self, status_code, data, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers
+
+
+def _negotiate(request):
+    """
+    Picks the renderer as DRF does and sets accepted_renderer / accepted_media_type on
+    the request, where wants_native_types and rider_data_etag read them. 406 to the
+    first renderer, as DRF falls back to.
+    """
+    try:
+        renderer, media_type = AvailableContentNegotiation().select_renderer(Request(request), RENDERERS)
+    except NotAcceptable as e:
+        request.accepted_renderer, request.accepted_media_type = RENDERERS[0], RENDERERS[0].media_type
+        raise _Reply(e.status_code, {'detail': e.detail})
+    request.accepted_renderer, request.accepted_media_type = renderer, media_type
+
+
+def _authenticate(request):
+    try:
+        authenticate_rider_request(request)
+    except AuthenticationFailed as e:
+        raise _Reply(e.status_code, {'detail': e.detail}, {'WWW-Authenticate': RiderTokenAuthentication.keyword})
+
+
+def _render(request, data, status_code=status.HTTP_200_OK, headers=None):
+    """A DRF Response rendered with the negotiated renderer, as APIView.finalize_response does."""
+    response = Response(data, status=status_code, headers=headers)
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = {'request': request}
+    patch_vary_headers(response, ['Accept'])
+    return response.render()
+
+
+def _resolve(request, rider_id):
+    # The rider and ETag as the sync views find them: no query for the token's own rider
+    return get_request_user(request, rider_id), rider_data_etag(request)
+
+
+def _fields(request, available):
+    try:
+        return requested_fields(request, available)
+    except ValueError as e:
+        raise _Reply(status.HTTP_400_BAD_REQUEST, {'error': str(e)})
+
+
+def rider_data_view(build):
+    """
+    Turns build(request, user_id, native) -> data into an async GET view for one rider,
+    with the conditional handling of rider_data_conditional: 304 for a matching
+    If-None-Match before build runs any query, the ETag and private, no-cache otherwise.
+    """
+    @wraps(build)
+    async def view(request):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        etag = None
+        try:
+            _negotiate(request)
+            _authenticate(request)
+            rider_id = request_rider_id(request, request.GET.get('rider_id'))
+            if not rider_id:
+                raise _Reply(status.HTTP_400_BAD_REQUEST, {'error': 'rider_id is required'})
+            user, etag = await sync_to_async(_resolve)(request, rider_id)
+            if etag is not None:
+                etag = quote_etag(etag)
+                response = get_conditional_response(request, etag=etag)
+                if response is not None:
+                    response['ETag'] = etag
+                    return mark_rider_data(response)
+            if not user:
+                raise _Reply(status.HTTP_404_NOT_FOUND, {'error': 'Invalid rider_id'})
+            response = _render(request, await build(request, user.pk, wants_native_types(request)))
+        except _Reply as reply:
+            response = _render(request, reply.data, reply.status_code, reply.headers)
+
+        if etag is not None:
+            response['ETag'] = etag
+        return mark_rider_data(response)
+    return view
+
+
+@rider_data_view
+async def dashboard_data(request, user_id, native):
+    rollup = await RiderBalance.objects.filter(pk=user_id).afirst()
+    if rollup is None:
+        rollup = await sync_to_async(_first_balance)(user_id)
+        if rollup is None:
+            raise _Reply(status.HTTP_404_NOT_FOUND, {'error': 'Invalid rider_id'})
+    return _balance_payload(rollup)
+
+
+@rider_data_view
+async def recent_transactions(request, user_id, native):
+    fields = _fields(request, RECENT_TRANSACTION_FIELDS)
+    read = _recent_columns(fields)
+    incomes = await fast_income_list.adata(_recent_ledger(Income, user_id), native, read)
+    expenses = await fast_expense_list.adata(_recent_ledger(Expense, user_id), native, read)
+    return {"transactions": _merge_transactions(incomes, expenses, fields)}
+
+
+@rider_data_view
+async def funds_list_api(request, user_id, native):
+    fields = _fields(request, fast_mutual_fund_list.field_names)
+    funds = MutualFund.objects.filter(user_id=user_id).order_by('-created_at', '-id')
+    return await fast_mutual_fund_list.adata(funds, native, fields)
+
+
+@rider_data_view
+async def portfolio_summary_api(request, user_id, native):
+    summary_data = await MutualFund.objects.filter(user_id=user_id).aaggregate(**_portfolio_totals())
+    return _portfolio_summary(summary_data['total_invested'], summary_data['total_current'])
+
+
+async def market_data_api(request):
+    """market_data_api for ASGI: a cache miss awaits NSE without holding a worker thread."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        _negotiate(request)
+    except _Reply as reply:
+        return _render(request, reply.data, reply.status_code)
+    return _render(request, await market_data_cache.aget())
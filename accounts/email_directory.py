@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+
+from .models import RiderInfo
+
+
+def normalize_email(email):
+    """The form emails are stored and looked up in: trimmed and lowercased."""
+    return (email or '').strip().lower()
+
+
+def with_lower_email(queryset):
+    """
+    The queryset with email_lower = LOWER(email) to filter on: the expression the
+    functional indexes on auth_user and accounts_riderinfo are built on (migration 0012).
+    email__iexact compiles to LIKE on MySQL and cannot use them.
+    """
+    return queryset.alias(email_lower=Lower('email'))
+
+
+def users_with_email(email):
+    return with_lower_email(User.objects.all()).filter(email_lower=normalize_email(email))
+
+
+def riders_with_email(email):
+    return with_lower_email(RiderInfo.objects.all()).filter(email_lower=normalize_email(email))
+
+
+def email_in_use(email):
+    return users_with_email(email).exists()
+
+
+def registered_emails(emails):
+    """The subset of emails (already normalized) that belong to some user, in one indexed query."""
+    return set(
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=list(emails))
+        .values_list('email_lower', flat=True)
+    )
@@ -0,0 +1,64 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts.provisioning import PROVISION_CHUNK_SIZE, provision_riders, read_riders
+
+
+class Command(BaseCommand):
+    help = (
+        'Create riders in bulk from a CSV (email,first_name,last_name,password,location) '
+        'or JSON file, bypassing the per-user signals'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file of riders')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json'],
+            help='File format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processes hashing passwords (default: one per CPU, 0: no pool)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=PROVISION_CHUNK_SIZE,
+            help=f'Riders written per transaction (default: {PROVISION_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the per-row results as JSON to this file',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+
+        try:
+            with open(path, 'rb') as stream:
+                rows = read_riders(stream, fmt)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        started = time.perf_counter()
+        created, results = provision_riders(rows, workers=options['workers'], chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        for result in results:
+            if result['status'] == 'error':
+                self.stdout.write(self.style.WARNING(f"Row {result['index']}: {result['errors']}"))
+
+        if options['report']:
+            with open(options['report'], 'w') as report:
+                json.dump(results, report, indent=2, default=str)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Provisioned {created} of {len(rows)} riders in {elapsed:.1f}s')
+        )
+        if created < len(rows):
+            raise CommandError(f'{len(rows) - created} riders could not be provisioned')
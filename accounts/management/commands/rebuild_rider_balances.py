@@ -0,0 +1,167 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.contrib.auth.models import User
+from accounts.models import Income, Expense, RiderBalance, DailySummary
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-rider balance rollups and daily summaries from the Income/Expense tables, '
+        'or with --verify check both without writing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare the stored rollups with the raw tables; exit with an error on any mismatch',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows written per INSERT (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        # The ledger is read in the same transaction that checks or rewrites the rollups,
+        # so both sides come from one snapshot
+        with transaction.atomic():
+            expected = self.ledger_totals()
+            if options['verify']:
+                self.verify(expected)
+            else:
+                self.rebuild(expected, options['batch_size'])
+
+    def ledger_totals(self):
+        zero = Decimal('0.00')
+
+        # One grouped query per table instead of one aggregate per user
+        incomes = dict(
+            Income.objects.values_list('user_id').annotate(total=Sum('amount')).order_by()
+        )
+        expenses = dict(
+            Expense.objects.values_list('user_id').annotate(total=Sum('amount')).order_by()
+        )
+
+        expected = {}
+        for user_id in User.objects.values_list('pk', flat=True).iterator():
+            total_income = incomes.get(user_id) or zero
+            total_expense = expenses.get(user_id) or zero
+            expected[user_id] = (total_income, total_expense, total_income - total_expense)
+        return expected
+
+    def ledger_summaries(self):
+        """(user_id, day, kind, category, total, entry_count) for every DailySummary bucket the ledger implies."""
+        for model in (Income, Expense):
+            rows = (
+                model.objects.values_list('user_id', 'date', model.LEDGER_LABEL_FIELD)
+                .annotate(total=Sum('amount'), entry_count=Count('id'))
+                .order_by()
+            )
+            for user_id, day, category, total, entry_count in rows.iterator():
+                yield user_id, day, model.LEDGER_KIND, category, total, entry_count
+
+    def verify(self, expected):
+        stored = {
+            row[0]: row[1:]
+            for row in RiderBalance.objects.values_list(
+                'user_id', 'total_income', 'total_expense', 'total_saving'
+            ).iterator()
+        }
+
+        mismatches = 0
+        for user_id, totals in expected.items():
+            if stored.get(user_id) != totals:
+                mismatches += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'User {user_id}: stored {stored.get(user_id)} != ledger {totals}'
+                    )
+                )
+
+        summary_mismatches, summary_count = self.verify_daily_summaries()
+
+        if mismatches or summary_mismatches:
+            raise CommandError(
+                f'{mismatches} of {len(expected)} rider balances and '
+                f'{summary_mismatches} daily summaries are out of date'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'All {len(expected)} rider balances and {summary_count} daily summaries match the ledger'
+        ))
+
+    def verify_daily_summaries(self):
+        """(mismatched buckets, buckets in the ledger); a bucket missing on either side is a mismatch."""
+        expected = {row[:4]: row[4:] for row in self.ledger_summaries()}
+        stored = {
+            row[:4]: row[4:]
+            for row in DailySummary.objects.values_list(
+                'user_id', 'day', 'kind', 'category', 'total', 'entry_count'
+            ).iterator()
+        }
+
+        mismatches = 0
+        for key in expected.keys() | stored.keys():
+            if stored.get(key) != expected.get(key):
+                mismatches += 1
+                user_id, day, kind, category = key
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'User {user_id} {day} {kind} {category!r}: stored {stored.get(key)} != ledger {expected.get(key)}'
+                    )
+                )
+        return mismatches, len(expected)
+
+    def rebuild(self, expected, batch_size):
+        balances = [
+            RiderBalance(
+                user_id=user_id,
+                total_income=total_income,
+                total_expense=total_expense,
+                total_saving=total_saving,
+            )
+            for user_id, (total_income, total_expense, total_saving) in expected.items()
+        ]
+
+        upsert = {
+            'update_conflicts': True,
+            'update_fields': ['total_income', 'total_expense', 'total_saving', 'updated_at'],
+        }
+        if connection.features.supports_update_conflicts_with_target:
+            upsert['unique_fields'] = ['user']
+        # else MySQL: ON DUPLICATE KEY UPDATE takes no conflict target and rejects unique_fields
+
+        RiderBalance.objects.bulk_create(balances, batch_size=batch_size, **upsert)
+        summary_count = self.rebuild_daily_summaries(batch_size)
+        # Totals may have changed under cached dashboard responses
+        RiderBalance.objects.update(data_version=F('data_version') + 1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully rebuilt {len(balances)} rider balances and {summary_count} daily summaries'
+            )
+        )
+
+    def rebuild_daily_summaries(self, batch_size):
+        DailySummary.objects.all().delete()
+
+        count = 0
+        batch = []
+        for user_id, day, kind, category, total, entry_count in self.ledger_summaries():
+            batch.append(DailySummary(
+                user_id=user_id, day=day, kind=kind, category=category,
+                total=total, entry_count=entry_count,
+            ))
+            if len(batch) >= batch_size:
+                DailySummary.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        DailySummary.objects.bulk_create(batch)
+        count += len(batch)
+
+        return count
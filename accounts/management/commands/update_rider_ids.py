@@ -1,35 +1,43 @@
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
 from accounts.models import Profile
-import random
+from accounts.rider_cache import rider_resolver
+from accounts.rider_ids import allocate_rider_id, allocate_rider_ids
 
 
 class Command(BaseCommand):
     help = 'Update existing rider_ids to 8-digit format'
 
     def handle(self, *args, **options):
-        profiles = Profile.objects.all()
+        profiles = [
+            profile for profile in Profile.objects.select_related('user')
+            if not profile.rider_id or len(profile.rider_id) != 8 or not profile.rider_id.isdigit()
+        ]
         updated_count = 0
-        
-        for profile in profiles:
-            if not profile.rider_id or len(profile.rider_id) != 8 or not profile.rider_id.isdigit():
-                # Generate new 8-digit rider_id
-                new_rider_id = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-                
-                # Ensure uniqueness
-                while Profile.objects.filter(rider_id=new_rider_id).exists():
-                    new_rider_id = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-                
-                old_rider_id = profile.rider_id
+
+        # One counter reservation for the whole run instead of a probe loop per profile
+        for profile, new_rider_id in zip(profiles, allocate_rider_ids(len(profiles))):
+            old_rider_id = profile.rider_id
+            while True:
                 profile.rider_id = new_rider_id
-                profile.save()
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Updated rider_id for user {profile.user.username}: {old_rider_id} -> {new_rider_id}'
-                    )
+                try:
+                    with transaction.atomic():
+                        profile.save()
+                    break
+                except IntegrityError:
+                    # Only possible against a random id issued before the allocator existed
+                    new_rider_id = allocate_rider_id()
+
+            # The profile signal clears the new id; the old one has to be dropped here
+            rider_resolver.invalidate(old_rider_id)
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Updated rider_id for user {profile.user.username}: {old_rider_id} -> {new_rider_id}'
                 )
-                updated_count += 1
-        
+            )
+            updated_count += 1
+
         self.stdout.write(
             self.style.SUCCESS(f'Successfully updated {updated_count} rider_ids')
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,265 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+try:
+    import httpx
+except ImportError:  # optional; async callers then fetch with requests in a worker thread
+    httpx = None
+
+
+NSE_URL = 'https://www.nseindia.com/api/allIndices'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# name in the NSE feed -> key in our payload
+INDICES = {
+    'NIFTY 50': 'nifty50',
+    'NIFTY 100': 'nifty100',
+    'NIFTY BANK': 'bankNifty',
+}
+
+
+def unavailable_payload():
+    return {
+        "marketStatus": "Unavailable",
+        "nifty50": None,
+        "nifty100": None,
+        "bankNifty": None
+    }
+
+
+def format_market_data(nse_data):
+    """Pick the indices the dashboard shows out of the NSE allIndices response."""
+    payload = unavailable_payload()
+    payload["marketStatus"] = nse_data.get("marketStatus", "Unavailable")
+
+    by_name = {item.get("index"): item for item in nse_data.get("data", [])}
+    for name, key in INDICES.items():
+        data = by_name.get(name)
+        if data:
+            payload[key] = {
+                "name": name, "value": data["last"], "change": data["variation"],
+                "percentChange": data["percentChange"], "open": data["open"],
+                "high": data["high"], "low": data["low"], "prevClose": data["previousClose"]
+            }
+    return payload
+
+
+def create_session():
+    """A pooled session so repeated upstream calls reuse the TLS connection."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class MarketDataCache:
+    """
+    In-process cache in front of the NSE feed, shared by every request in the worker.
+
+    - Fresh entries (younger than ttl) are returned as is.
+    - Stale entries (up to ttl + stale_ttl) are returned immediately while one
+      background thread refreshes them.
+    - Without usable data, concurrent callers wait on a single upstream call
+      (single-flight) instead of each making their own.
+    - Failures fall back to the last good payload, or to the "Unavailable"
+      payload, which is kept for error_ttl so a dead upstream is not hammered.
+    - A caller waits at most wait_budget seconds for the upstream call (which
+      itself may take up to timeout); past that it gets the fallback payload
+      and the call finishes in the background for the next request.
+    - Circuit breaker: after failure_threshold consecutive failures the circuit
+      opens and, for reset_timeout seconds, nothing is sent upstream; callers get
+      the fallback straight away. Then one probe call is let through (half-open):
+      success closes the circuit, failure opens it for another reset_timeout.
+
+    aget() is the same for async views: a miss awaits the upstream call (httpx
+    when installed) instead of holding a thread, and joins a call already in flight.
+    """
+
+    def __init__(self, url=NSE_URL, ttl=30, stale_ttl=300, error_ttl=15, timeout=5, session=None,
+                 wait_budget=2, failure_threshold=5, reset_timeout=60):
+        self.url = url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self.wait_budget = wait_budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session = session or create_session()
+        self._lock = threading.Lock()
+        self._entry = None  # (payload, fresh_until, stale_until)
+        self._last_good = None
+        self._inflight = None
+        self._refresh_task = None
+        self._circuit = 'closed'  # 'closed', 'open' or 'half_open'
+        self._failures = 0  # consecutive
+        self._open_until = 0
+        self._stats = {
+            'hits': 0, 'stale_hits': 0, 'misses': 0, 'upstream_calls': 0, 'upstream_errors': 0,
+            'over_budget': 0, 'circuit_opened': 0, 'short_circuited': 0, 'probes': 0,
+        }
+
+    def get(self):
+        payload, future, leader = self._lookup()
+        if future is None:
+            return payload
+        if leader:
+            # In the background, so this caller too can give up after wait_budget
+            threading.Thread(target=self._refresh, args=(future,), daemon=True).start()
+        try:
+            return future.result(timeout=self.wait_budget)
+        except FutureTimeoutError:
+            return self._over_budget()
+
+    async def aget(self):
+        payload, future, leader = self._lookup()
+        if future is None:
+            return payload
+        if leader:
+            self._refresh_task = asyncio.ensure_future(self._arefresh(future))
+        try:
+            # shield: a caller giving up must not cancel the call the others wait on
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_budget)
+        except asyncio.TimeoutError:
+            return self._over_budget()
+
+    def _over_budget(self):
+        with self._lock:
+            self._stats['over_budget'] += 1
+            return self._last_good or unavailable_payload()
+
+    def _may_call_upstream(self, now):
+        # Called with the lock held, before starting any upstream call
+        if self._circuit == 'open':
+            if now < self._open_until:
+                return False
+            self._circuit = 'half_open'
+            self._stats['probes'] += 1
+        return True
+
+    def _lookup(self):
+        """(payload, None, False) when cached; otherwise (None, future of the refresh, whether to run it)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._entry is not None:
+                payload, fresh_until, stale_until = self._entry
+                if now < fresh_until:
+                    self._stats['hits'] += 1
+                    return payload, None, False
+                if now < stale_until:
+                    self._stats['stale_hits'] += 1
+                    if self._inflight is None and self._may_call_upstream(now):
+                        self._inflight = Future()
+                        threading.Thread(target=self._refresh, args=(self._inflight,), daemon=True).start()
+                    return payload, None, False
+
+            self._stats['misses'] += 1
+            future = self._inflight
+            leader = future is None
+            if leader:
+                if not self._may_call_upstream(now):
+                    self._stats['short_circuited'] += 1
+                    return self._last_good or unavailable_payload(), None, False
+                future = self._inflight = Future()
+        return None, future, leader
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+            self._last_good = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = self._entry is not None
+            stats['circuit'] = self._circuit
+            stats['consecutive_failures'] = self._failures
+            retry_in = self._open_until - time.monotonic() if self._circuit == 'open' else 0
+            stats['circuit_retry_in'] = round(max(0, retry_in), 1)
+        return stats
+
+    def fetch(self):
+        """One upstream call; raises on network errors or an unexpected response."""
+        response = self.session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return format_market_data(response.json())
+
+    async def afetch(self):
+        """fetch() without blocking the event loop."""
+        if httpx is None:
+            return await sync_to_async(self.fetch, thread_sensitive=False)()
+        # A client per call: it is bound to the running loop, and calls are at most one per ttl
+        async with httpx.AsyncClient(headers=HEADERS, timeout=self.timeout) as client:
+            response = await client.get(self.url)
+        response.raise_for_status()
+        return format_market_data(response.json())
+
+    def _refresh(self, future):
+        with self._lock:
+            self._stats['upstream_calls'] += 1
+        try:
+            payload = self.fetch()
+        except Exception as e:
+            self._failed(future, e)
+        else:
+            self._stored(future, payload)
+
+    async def _arefresh(self, future):
+        with self._lock:
+            self._stats['upstream_calls'] += 1
+        try:
+            payload = await self.afetch()
+        except Exception as e:
+            self._failed(future, e)
+        else:
+            self._stored(future, payload)
+
+    def _failed(self, future, e):
+        # Anything, including a malformed feed; waiters must always get a payload
+        print(f"CRITICAL: Error fetching NSE data: {e}")
+        with self._lock:
+            self._stats['upstream_errors'] += 1
+            payload = self._last_good or unavailable_payload()
+            now = time.monotonic()
+            self._entry = (payload, now + self.error_ttl, now + self.error_ttl)
+            self._inflight = None
+            self._failures += 1
+            if self._circuit == 'half_open' or (self._circuit == 'closed' and self._failures >= self.failure_threshold):
+                print(f"CRITICAL: NSE circuit open for {self.reset_timeout}s after {self._failures} failures")
+                self._circuit = 'open'
+                self._open_until = now + self.reset_timeout
+                self._stats['circuit_opened'] += 1
+        future.set_result(payload)
+
+    def _stored(self, future, payload):
+        with self._lock:
+            now = time.monotonic()
+            self._entry = (payload, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._last_good = payload
+            self._inflight = None
+            self._failures = 0
+            self._circuit = 'closed'
+        future.set_result(payload)
+
+
+market_data_cache = MarketDataCache(
+    url=getattr(settings, 'MARKET_DATA_URL', NSE_URL),
+    ttl=getattr(settings, 'MARKET_DATA_TTL', 30),
+    stale_ttl=getattr(settings, 'MARKET_DATA_STALE_TTL', 300),
+    error_ttl=getattr(settings, 'MARKET_DATA_ERROR_TTL', 15),
+    timeout=getattr(settings, 'MARKET_DATA_TIMEOUT', 5),
+    wait_budget=getattr(settings, 'MARKET_DATA_WAIT_BUDGET', 2),
+    failure_threshold=getattr(settings, 'MARKET_DATA_FAILURE_THRESHOLD', 5),
+    reset_timeout=getattr(settings, 'MARKET_DATA_RESET_TIMEOUT', 60),
+)
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from django.conf import settings
+
+from .market_data import market_data_cache
+
+
+class _Subscriber:
+    """Changes waiting for one client; newer values overwrite older ones so a slow client never piles up events."""
+
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, changes):
+        self.pending.update(changes)
+        self.ready.set()
+
+    def take(self):
+        changes, self.pending = self.pending, {}
+        self.ready.clear()
+        return changes
+
+
+class MarketBroadcaster:
+    """
+    Fans market index updates out to every Server-Sent Events client in this process.
+    A single poller task reads the shared market data cache while anyone is
+    subscribed and pushes only the keys whose values changed.
+    """
+
+    def __init__(self, interval=15):
+        self.interval = interval
+        self._subscribers = set()
+        self._latest = {}
+        self._task = None
+
+    def subscribe(self):
+        subscriber = _Subscriber()
+        if self._latest:
+            subscriber.push(self._latest)
+        self._subscribers.add(subscriber)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._poll())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, payload):
+        changes = {key: value for key, value in payload.items() if self._latest.get(key) != value}
+        if changes:
+            self._latest = {**self._latest, **changes}
+            for subscriber in self._subscribers:
+                subscriber.push(changes)
+        return changes
+
+    async def _poll(self):
+        while True:
+            try:
+                self.publish(await market_data_cache.aget())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"CRITICAL: Market data stream poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def market_event_stream(broadcaster, max_duration, keepalive=15):
+    """
+    Async iterator of SSE messages for one client. The first message is a
+    'snapshot' with everything known so far, later ones are 'update's with only
+    the changed keys. The stream ends after max_duration seconds and the browser
+    reconnects, so connections to vanished clients do not live forever.
+    """
+    subscriber = broadcaster.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_duration
+    event = 'snapshot'
+    try:
+        yield "retry: 3000\n\n"
+        while loop.time() < deadline:
+            try:
+                await asyncio.wait_for(subscriber.ready.wait(), timeout=min(keepalive, max(deadline - loop.time(), 0)))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield sse_event(event, subscriber.take())
+            event = 'update'
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+market_broadcaster = MarketBroadcaster(interval=getattr(settings, 'MARKET_STREAM_INTERVAL', 15))
@@ -0,0 +1,76 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+def is_lean_api_request(request):
+    """
+    True for JSON API calls, which identify the rider by rider_id or a rider token
+    and never use sessions, messages, CSRF cookies or frame options.
+    Paths in API_SESSION_PATHS (views authenticated by the admin session) keep the full stack.
+    """
+    path = request.path_info
+    return (path.startswith(getattr(settings, 'LEAN_API_PREFIX', '/api/'))
+            and not path.startswith(tuple(getattr(settings, 'API_SESSION_PATHS', ()))))
+
+
+class PageOnlyMixin:
+    """Runs the wrapped Django middleware for HTML pages and admin only; /api/ requests pass straight through."""
+
+    def __call__(self, request):
+        if is_lean_api_request(request):
+            # A coroutine under ASGI, which the handler awaits like the parent's __acall__
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class PageSessionMiddleware(PageOnlyMixin, SessionMiddleware):
+    pass
+
+
+class PageCsrfViewMiddleware(PageOnlyMixin, CsrfViewMiddleware):
+    # DRF views do their own CSRF check for session-authenticated requests, so nothing is lost
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # The handler calls process_view directly, not through __call__
+        if is_lean_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class PageAuthenticationMiddleware(PageOnlyMixin, AuthenticationMiddleware):
+    pass
+
+
+class PageMessageMiddleware(PageOnlyMixin, MessageMiddleware):
+    pass
+
+
+class PageXFrameOptionsMiddleware(PageOnlyMixin, XFrameOptionsMiddleware):
+    pass
+
+
+class ASGIURLConfMiddleware:
+    """
+    Resolves requests against ASGI_URLCONF when the app is served by an ASGI server,
+    so the async versions of the read APIs (accounts/async_urls.py) take over there.
+    Not loaded under WSGI or when ASGI_URLCONF is None. Async only: under ASGI
+    a sync middleware anywhere in the stack would put every request back on a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        if not self.urlconf or not iscoroutinefunction(get_response):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    async def __call__(self, request):
+        request.urlconf = self.urlconf
+        return await self.get_response(request)
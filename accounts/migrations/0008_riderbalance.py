@@ -0,0 +1,31 @@
+# Generated by Django 4.2.14 on 2026-10-18 09:12
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0007_alter_profile_options_profile_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiderBalance',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_expense', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_saving', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rider Balance',
+                'verbose_name_plural': 'Rider Balances',
+            },
+        ),
+    ]
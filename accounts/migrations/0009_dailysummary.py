@@ -0,0 +1,64 @@
+# Generated by Django 4.2.14 on 2026-10-18 10:03
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    DailySummary = apps.get_model('accounts', 'DailySummary')
+    sources = [
+        (apps.get_model('accounts', 'Income'), 'income', 'source'),
+        (apps.get_model('accounts', 'Expense'), 'expense', 'category'),
+    ]
+
+    for model, kind, label_field in sources:
+        rows = (
+            model.objects.values_list('user_id', 'date', label_field)
+            .annotate(total=Sum('amount'), entry_count=Count('id'))
+            .order_by()
+        )
+        batch = []
+        for user_id, day, category, total, entry_count in rows.iterator():
+            batch.append(DailySummary(
+                user_id=user_id, day=day, kind=kind, category=category,
+                total=total, entry_count=entry_count,
+            ))
+            if len(batch) >= 1000:
+                DailySummary.objects.bulk_create(batch)
+                batch = []
+        DailySummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0008_riderbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('kind', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=7)),
+                ('category', models.CharField(max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Summary',
+                'verbose_name_plural': 'Daily Summaries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'kind', 'category'), name='daily_summary_bucket'),
+        ),
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.14 on 2026-10-18 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0009_dailysummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='income_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mutualfund',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='mutualfund_user_created_idx'),
+        ),
+    ]
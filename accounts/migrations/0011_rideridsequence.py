@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+def create_sequence_row(apps, schema_editor):
+    RiderIdSequence = apps.get_model('accounts', 'RiderIdSequence')
+    RiderIdSequence.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_income_expense_mutualfund_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiderIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Rider ID Sequence',
+            },
+        ),
+        migrations.RunPython(create_sequence_row, migrations.RunPython.noop),
+    ]
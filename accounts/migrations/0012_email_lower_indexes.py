@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-18 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+# auth_user belongs to django.contrib.auth, so its index cannot be declared in a model Meta here
+AUTH_USER_EMAIL_INDEX = models.Index(django.db.models.functions.text.Lower('email'), name='auth_user_email_lower_idx')
+
+
+def add_auth_user_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), AUTH_USER_EMAIL_INDEX)
+
+
+def remove_auth_user_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), AUTH_USER_EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0011_rideridsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='riderinfo',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='riderinfo_email_lower_idx'),
+        ),
+        migrations.RunPython(add_auth_user_index, remove_auth_user_index),
+    ]
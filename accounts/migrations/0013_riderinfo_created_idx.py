@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_email_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='riderinfo',
+            index=models.Index(fields=['created_at', 'rider_id'], name='riderinfo_created_idx'),
+        ),
+    ]
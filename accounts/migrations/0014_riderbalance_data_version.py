@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_riderinfo_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riderbalance',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -1,11 +1,51 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+
+from .rider_cache import rider_resolver
+from .rider_ids import allocate_rider_id
+
+
+class LedgerEntryMixin:
+    """
+    Shared behaviour for Income and Expense rows.
+    Remembers the values a row was loaded with so the rollups can apply
+    the difference on edit, and runs every save in a transaction so the
+    rollup updates commit (or roll back) together with the row.
+    """
+    LEDGER_KIND = None
+    LEDGER_LABEL_FIELD = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._ledger_snapshot = instance.ledger_values()
+        return instance
+
+    def ledger_values(self):
+        """The fields the rollups depend on, normalised to their Python types."""
+        # Read from __dict__ so deferred fields are not fetched just for this
+        values = {'user_id': self.__dict__.get('user_id')}
+        for key, field_name in (('amount', 'amount'), ('date', 'date'), ('label', self.LEDGER_LABEL_FIELD)):
+            value = self.__dict__.get(field_name)
+            values[key] = self._meta.get_field(field_name).to_python(value) if value is not None else None
+        return values
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Income(LedgerEntryMixin, models.Model):
+    LEDGER_KIND = 'income'
+    LEDGER_LABEL_FIELD = 'source'
 
-class Income(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='incomes')
     source = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -16,8 +56,17 @@ class Income(models.Model):
     def __str__(self):
         return f"{self.source} - {self.amount}"
 
+    class Meta:
+        indexes = [
+            # Per-rider history, newest first (recent and paginated transaction lists)
+            models.Index(fields=['user', 'date', 'created_at', 'id'], name='income_user_date_idx'),
+        ]
+
+
+class Expense(LedgerEntryMixin, models.Model):
+    LEDGER_KIND = 'expense'
+    LEDGER_LABEL_FIELD = 'category'
 
-class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expenses')
     category = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -28,6 +77,180 @@ class Expense(models.Model):
     def __str__(self):
         return f"{self.category} - {self.amount}"
 
+    class Meta:
+        indexes = [
+            # Per-rider history, newest first (recent and paginated transaction lists)
+            models.Index(fields=['user', 'date', 'created_at', 'id'], name='expense_user_date_idx'),
+        ]
+
+
+class RiderBalance(models.Model):
+    """
+    Running income/expense/saving totals per user.
+    Kept up to date by the Income/Expense signals below so the dashboard
+    reads one row instead of summing the whole ledger.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='balance')
+    total_income = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_expense = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_saving = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+    # Bumped with every Income/Expense/MutualFund/Profile write; the dashboard APIs derive their ETags from it
+    data_version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id} - Saving: {self.total_saving}'
+
+    class Meta:
+        verbose_name = 'Rider Balance'
+        verbose_name_plural = 'Rider Balances'
+
+    @staticmethod
+    def totals_from_ledger(user_id):
+        """Compute the totals straight from the raw Income/Expense tables."""
+        total_income = Income.objects.filter(user_id=user_id).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        total_expense = Expense.objects.filter(user_id=user_id).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        return {
+            'total_income': total_income,
+            'total_expense': total_expense,
+            'total_saving': total_income - total_expense,
+        }
+
+    @classmethod
+    def rebuild_for(cls, user_id):
+        """Recompute one user's rollup from the raw tables and store it."""
+        balance, _ = cls.objects.update_or_create(user_id=user_id, defaults=cls.totals_from_ledger(user_id))
+        return balance
+
+    @classmethod
+    def apply_delta(cls, user_id, field, delta):
+        """
+        Add delta to total_income or total_expense (and adjust total_saving).
+        Returns the number of rows updated, 0 if the user has no rollup yet.
+        """
+        saving_delta = delta if field == 'total_income' else -delta
+        return cls.objects.filter(user_id=user_id).update(**{
+            field: F(field) + delta,
+            'total_saving': F('total_saving') + saving_delta,
+            'updated_at': timezone.now(),
+        })
+
+    @classmethod
+    def bump_version(cls, user_id):
+        """
+        Mark one user's data as changed. Runs in the writer's transaction, so a
+        reader never sees the new version together with the old rows.
+        """
+        return cls.objects.filter(user_id=user_id).update(data_version=F('data_version') + 1)
+
+
+class DailySummary(models.Model):
+    """
+    Income/expense totals per user, day and category (source for incomes).
+    Kept up to date by the Income/Expense signals below and read by the
+    analytics API, so charts scan a few summary rows instead of the ledger.
+    """
+    KIND_INCOME = 'income'
+    KIND_EXPENSE = 'expense'
+    KIND_CHOICES = [
+        (KIND_INCOME, 'Income'),
+        (KIND_EXPENSE, 'Expense'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_summaries')
+    day = models.DateField()
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES)
+    category = models.CharField(max_length=100)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    entry_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id} {self.day} {self.kind} {self.category} - {self.total}'
+
+    class Meta:
+        verbose_name = 'Daily Summary'
+        verbose_name_plural = 'Daily Summaries'
+        constraints = [
+            # Also serves as the (user, day, ...) index for date-range scans
+            models.UniqueConstraint(fields=['user', 'day', 'kind', 'category'], name='daily_summary_bucket'),
+        ]
+
+    @classmethod
+    def apply_delta(cls, user_id, day, kind, category, amount, count):
+        """Add amount/count to one bucket, creating it on the first entry and dropping it once empty."""
+        bucket = cls.objects.filter(user_id=user_id, day=day, kind=kind, category=category)
+        updated = bucket.update(total=F('total') + amount, entry_count=F('entry_count') + count)
+
+        if not updated and count > 0:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        user_id=user_id, day=day, kind=kind, category=category,
+                        total=amount, entry_count=count,
+                    )
+            except IntegrityError:
+                # Another request created the bucket first
+                bucket.update(total=F('total') + amount, entry_count=F('entry_count') + count)
+        elif updated and count < 0:
+            bucket.filter(entry_count=0).delete()
+
+    @classmethod
+    def apply_deltas(cls, user_id, deltas):
+        """
+        Apply many bucket changes at once, e.g. after a bulk insert.
+        deltas maps (day, kind, category) to (amount, count) and only adds entries.
+        Existing buckets are locked and rewritten with one bulk_update; new ones are bulk created.
+        """
+        if not deltas:
+            return
+        existing = {
+            (summary.day, summary.kind, summary.category): summary
+            for summary in cls.objects.select_for_update().filter(
+                user_id=user_id, day__in={day for day, _, _ in deltas}
+            )
+        }
+
+        changed, created = [], []
+        for key, (amount, count) in deltas.items():
+            summary = existing.get(key)
+            if summary is None:
+                day, kind, category = key
+                created.append(cls(user_id=user_id, day=day, kind=kind, category=category,
+                                   total=amount, entry_count=count))
+            else:
+                summary.total += amount
+                summary.entry_count += count
+                changed.append(summary)
+
+        cls.objects.bulk_update(changed, ['total', 'entry_count'], batch_size=500)
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(created, batch_size=500)
+        except IntegrityError:
+            # Another request created some of these buckets in the meantime
+            for summary in created:
+                cls.apply_delta(user_id, summary.day, summary.kind, summary.category,
+                                summary.total, summary.entry_count)
+
+    @classmethod
+    def rebuild_for(cls, user_id):
+        """Recompute one user's buckets from the raw Income/Expense tables."""
+        cls.objects.filter(user_id=user_id).delete()
+        summaries = []
+        for model in (Income, Expense):
+            rows = (
+                model.objects.filter(user_id=user_id)
+                .values_list('date', model.LEDGER_LABEL_FIELD)
+                .annotate(total=Sum('amount'), entry_count=Count('id'))
+                .order_by()
+            )
+            summaries.extend(
+                cls(user_id=user_id, day=day, kind=model.LEDGER_KIND, category=category,
+                    total=total, entry_count=entry_count)
+                for day, category, total, entry_count in rows
+            )
+        cls.objects.bulk_create(summaries, batch_size=1000)
+
 
 class MutualFund(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mutual_funds')
@@ -39,7 +262,26 @@ class MutualFund(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.fund_type})"
+
+    class Meta:
+        indexes = [
+            # Per-rider fund list, newest first
+            models.Index(fields=['user', 'created_at', 'id'], name='mutualfund_user_created_idx'),
+        ]
     
+class RiderIdSequence(models.Model):
+    """
+    Single-row counter behind rider_id allocation (see accounts/rider_ids.py).
+    MySQL has no sequences, so this row plays that part.
+    """
+    next_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'Next rider_id counter: {self.next_value}'
+
+    class Meta:
+        verbose_name = 'Rider ID Sequence'
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     location = models.CharField(max_length=100, blank=True)
@@ -73,35 +315,50 @@ class RiderInfo(models.Model):
         verbose_name = 'Rider Information'
         verbose_name_plural = 'Rider Information'
         ordering = ['-created_at']
+        indexes = [
+            # Case-insensitive email lookups (see accounts/email_directory.py)
+            models.Index(Lower('email'), name='riderinfo_email_lower_idx'),
+            # Keyset pages of the rider directory
+            models.Index(fields=['created_at', 'rider_id'], name='riderinfo_created_idx'),
+        ]
 
 # --- SIGNAL TO AUTO-CREATE PROFILE AND RIDER INFO ---
+RIDER_ID_ATTEMPTS = 5
+
+
 # This function creates a Profile and RiderInfo the moment a User is created.
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        import random
-        # Generate a unique 8-digit rider_id (numbers only)
-        rider_id = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-        # Ensure uniqueness across both Profile and RiderInfo
-        while (Profile.objects.filter(rider_id=rider_id).exists() or 
-               RiderInfo.objects.filter(rider_id=rider_id).exists()):
-            rider_id = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-        
-        # Create Profile
-        Profile.objects.create(user=instance, rider_id=rider_id)
-        
-        # Create RiderInfo for explicit tracking
-        RiderInfo.objects.create(
-            rider_id=rider_id,
-            user=instance,
-            email=instance.email,
-            username=instance.username
-        )
+        # Unique 8-digit rider_id from a keyed permutation of a DB counter, no existence checks
+        for attempt in range(RIDER_ID_ATTEMPTS):
+            rider_id = allocate_rider_id()
+            try:
+                with transaction.atomic():
+                    # Create Profile
+                    Profile.objects.create(user=instance, rider_id=rider_id)
+
+                    # Create RiderInfo for explicit tracking
+                    RiderInfo.objects.create(
+                        rider_id=rider_id,
+                        user=instance,
+                        email=instance.email,
+                        username=instance.username
+                    )
+                break
+            except IntegrityError:
+                # Only possible against a random id issued before the allocator existed
+                if attempt == RIDER_ID_ATTEMPTS - 1:
+                    raise
+
+        # Start the balance rollup at zero so ledger writes only need an UPDATE
+        RiderBalance.objects.create(user=instance)
 
 # Signal to update RiderInfo when User is updated
 @receiver(post_save, sender=User)
-def update_rider_info(sender, instance, created, **kwargs):
-    if not created:  # Only for updates, not creation
+def update_rider_info(sender, instance, created, update_fields=None, **kwargs):
+    # Only for updates, not creation, and only when email or username may have changed
+    if not created and (update_fields is None or {'email', 'username'} & set(update_fields)):
         try:
             rider_info = instance.rider_info
             rider_info.email = instance.email
@@ -121,3 +378,125 @@ def update_rider_info(sender, instance, created, **kwargs):
             except Profile.DoesNotExist:
                 pass
 
+
+# --- SIGNALS TO KEEP THE RIDER_ID -> USER CACHE FRESH ---
+@receiver(post_save, sender=User)
+def invalidate_rider_cache_for_user(sender, instance, created, **kwargs):
+    if not created:
+        for rider_id in Profile.objects.filter(user_id=instance.pk).values_list('rider_id', flat=True):
+            rider_resolver.invalidate(rider_id)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_rider_cache_for_profile(sender, instance, created=False, **kwargs):
+    # Covers profile updates and account deletion (the profile is deleted with the user);
+    # a brand-new profile cannot be cached yet
+    if not created:
+        rider_resolver.invalidate(instance.rider_id)
+
+
+# --- SIGNALS TO KEEP THE BALANCE AND DAILY SUMMARY ROLLUPS IN SYNC ---
+def _balance_field(sender):
+    return 'total_income' if sender is Income else 'total_expense'
+
+
+def _summary_bucket(sender, values):
+    return (values['user_id'], values['date'], sender.LEDGER_KIND, values['label'])
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixture loading; run rebuild_rider_balances afterwards to refresh the rollups
+        return
+
+    current = instance.ledger_values()
+    previous = None if created else getattr(instance, '_ledger_snapshot', None)
+
+    if not created and (previous is None or None in previous.values()):
+        # Saved without being loaded first, so the old values are unknown
+        RiderBalance.rebuild_for(instance.user_id)
+        DailySummary.rebuild_for(instance.user_id)
+    elif previous != current:
+        _update_balance(sender, previous, current)
+        _update_daily_summary(sender, previous, current)
+
+    instance._ledger_snapshot = current
+
+
+def _update_balance(sender, previous, current):
+    field = _balance_field(sender)
+    if previous is not None and previous['user_id'] != current['user_id']:
+        changes = [(previous['user_id'], -previous['amount']), (current['user_id'], current['amount'])]
+    else:
+        changes = [(current['user_id'], current['amount'] - (previous['amount'] if previous else 0))]
+
+    for user_id, delta in changes:
+        if delta and not RiderBalance.apply_delta(user_id, field, delta):
+            # First write for a user created before rollups existed
+            RiderBalance.rebuild_for(user_id)
+
+
+def _update_daily_summary(sender, previous, current):
+    bucket = _summary_bucket(sender, current)
+    if previous is not None and _summary_bucket(sender, previous) == bucket:
+        DailySummary.apply_delta(*bucket, current['amount'] - previous['amount'], 0)
+        return
+
+    if previous is not None:
+        DailySummary.apply_delta(*_summary_bucket(sender, previous), -previous['amount'], -1)
+    DailySummary.apply_delta(*bucket, current['amount'], 1)
+
+
+def record_bulk_entries(user_id, entries):
+    """
+    Update the rollups for Income/Expense rows inserted with bulk_create,
+    which does not send post_save. Call it inside the inserting transaction.
+    """
+    balance_deltas = {}
+    summary_deltas = {}
+    for entry in entries:
+        values = entry.ledger_values()
+        field = _balance_field(type(entry))
+        balance_deltas[field] = balance_deltas.get(field, 0) + values['amount']
+
+        _, day, kind, category = _summary_bucket(type(entry), values)
+        amount, count = summary_deltas.get((day, kind, category), (0, 0))
+        summary_deltas[(day, kind, category)] = (amount + values['amount'], count + 1)
+
+    for field, delta in balance_deltas.items():
+        if delta and not RiderBalance.apply_delta(user_id, field, delta):
+            # No rollup yet; the rebuild already includes every inserted row
+            RiderBalance.rebuild_for(user_id)
+            break
+    DailySummary.apply_deltas(user_id, summary_deltas)
+    RiderBalance.bump_version(user_id)
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # Deletes already run inside the collector's transaction.
+    # When the user itself is being deleted the rollup rows may be gone, which is fine.
+    RiderBalance.apply_delta(instance.user_id, _balance_field(sender), -instance.amount)
+    DailySummary.apply_delta(*_summary_bucket(sender, instance.ledger_values()), -instance.amount, -1)
+
+
+# --- SIGNALS TO BUMP THE PER-RIDER DATA VERSION (ETags of the dashboard APIs) ---
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=MutualFund)
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=MutualFund)
+@receiver(post_delete, sender=Profile)
+def bump_rider_data_version(sender, instance, created=False, raw=False, **kwargs):
+    # A brand-new user or profile has no balance row yet, and nothing was served for it
+    if raw or (created and sender in (User, Profile)):
+        return
+    # Names and email are part of the profile payload too
+    RiderBalance.bump_version(instance.pk if sender is User else instance.user_id)
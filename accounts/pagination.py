@@ -0,0 +1,25 @@
+import base64
+import json
+
+
+def encode_cursor(values):
+    """
+    Turn the sort key of the last row on a page into an opaque cursor string.
+    Values must be JSON serialisable (convert dates/datetimes with isoformat first).
+    """
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Reverse of encode_cursor. Raises ValueError if the cursor was not produced by us.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
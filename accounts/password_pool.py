@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from rest_framework import exceptions, status
+
+
+# True in the pool's own processes (and bulk provisioning's), which hash inline
+_hash_worker = False
+
+# Pools are started from multithreaded web workers, where a forked child can inherit a lock
+# another thread held and deadlock on it; forkserver (spawn where there is none) starts clean
+_start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def init_hash_worker():
+    # Under the forkserver and spawn start methods workers begin without Django configured
+    global _hash_worker
+    _hash_worker = True
+    import django
+    django.setup()
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    return func(*args), time.perf_counter() - start
+
+
+class PasswordPoolBusy(exceptions.APIException):
+    """Every hashing process is busy and the queue is full; DRF answers 503 with Retry-After: wait."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests right now. Please try again shortly.'
+    default_code = 'password_pool_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class PasswordHashPool:
+    """
+    A few processes that do all password hashing for this web worker, with a bounded queue.
+
+    PBKDF2 is pure CPU and holds the GIL, so hashing inline during a login burst stalls
+    every other request in the process. Here at most `workers` hashes run at once, off
+    the request threads; up to max_queue more wait for a process, and beyond that callers
+    get PasswordPoolBusy straight away instead of queueing. workers=0 hashes inline.
+    """
+
+    def __init__(self, workers=2, max_queue=16, retry_after=2, latency_window=1024):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._latencies = deque(maxlen=latency_window)  # (seconds waiting, seconds hashing)
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'errors': 0}
+
+    def run(self, func, *args):
+        """func(*args) in a pool process; raises PasswordPoolBusy when the queue is full."""
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._stats['rejected'] += 1
+                raise PasswordPoolBusy(self.retry_after)
+            self._pending += 1
+            self._stats['submitted'] += 1
+            executor = self._get_executor()
+
+        start = time.perf_counter()
+        try:
+            result, hash_seconds = executor.submit(_timed, func, *args).result()
+        except BaseException as e:
+            with self._lock:
+                self._pending -= 1
+                self._stats['errors'] += 1
+                if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                    # A worker died (e.g. OOM-killed); start a fresh pool on the next call
+                    self._executor = None
+            raise
+        total = time.perf_counter() - start
+        with self._lock:
+            self._pending -= 1
+            self._stats['completed'] += 1
+            self._latencies.append((max(0.0, total - hash_seconds), hash_seconds))
+        return result
+
+    def map(self, func, items, chunksize=1):
+        """
+        [func(item) for item in items] spread over the pool's processes, for batch jobs such
+        as bulk provisioning. Not limited by max_queue: the caller waits for the whole batch.
+        """
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            return list(executor.map(func, items, chunksize=chunksize))
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+
+    def _get_executor(self):
+        # Created on first use, and again in a process forked from the one that made it (gunicorn --preload)
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(_start_method),
+                initializer=init_hash_worker,
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            pending = self._pending
+            latencies = list(self._latencies)
+        stats.update({
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': pending,
+            'queue_depth': max(0, pending - self.workers),
+        })
+        for index, name in ((0, 'wait'), (1, 'hash')):
+            samples = sorted(sample[index] for sample in latencies)
+            stats[f'{name}_ms_p50'] = round(samples[len(samples) // 2] * 1000, 2) if samples else 0
+            stats[f'{name}_ms_p95'] = round(samples[int(len(samples) * 0.95)] * 1000, 2) if samples else 0
+            stats[f'{name}_ms_max'] = round(samples[-1] * 1000, 2) if samples else 0
+        return stats
+
+
+def _pbkdf2_encode(password, salt, iterations):
+    return PBKDF2PasswordHasher().encode(password, salt, iterations)
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the key derivation done in password_pool.
+    Hashes are identical to PBKDF2PasswordHasher's (same "pbkdf2_sha256" algorithm),
+    so it replaces it in PASSWORD_HASHERS with no migration. verify() goes through
+    encode(), so set_password, check_password and authenticate() are all covered.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        if _hash_worker or password_pool.workers == 0:
+            return super().encode(password, salt, iterations)
+        return password_pool.run(_pbkdf2_encode, password, salt, iterations or self.iterations)
+
+
+password_pool = PasswordHashPool(
+    workers=getattr(settings, 'PASSWORD_HASH_WORKERS', 2),
+    max_queue=getattr(settings, 'PASSWORD_HASH_MAX_QUEUE', 16),
+    retry_after=getattr(settings, 'PASSWORD_HASH_RETRY_AFTER', 2),
+)
@@ -0,0 +1,194 @@
+import codecs
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .email_directory import normalize_email, registered_emails
+from .models import Profile, RiderInfo, RiderBalance
+from .password_pool import PasswordHashPool, init_hash_worker
+from .rider_ids import allocate_rider_ids
+from .serializers import highest_username_suffixes, usernames_starting_with
+
+
+PROVISION_CHUNK_SIZE = 1000
+USERNAME_LOOKUP_BATCH = 200  # bases OR-ed into one prefix query; SQLite caps expression depth at 1000
+RIDER_FIELDS = ['email', 'first_name', 'last_name', 'password', 'location']
+
+# Hashes for provision_riders_api, kept between uploads; its processes start on the first one
+provision_pool = PasswordHashPool(workers=getattr(settings, 'PROVISION_HASH_WORKERS', None) or os.cpu_count() or 1)
+
+
+class RiderRowSerializer(serializers.Serializer):
+    """
+    One rider in a bulk provisioning file. Only the row itself is checked here;
+    emails already registered are found with one query per chunk.
+    """
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    # Required: there is no reset flow, so a rider created without one could never log in
+    password = serializers.CharField(min_length=6)
+    location = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
+    def validate_email(self, value):
+        return normalize_email(value)
+
+
+def read_riders(stream, fmt):
+    """Rows from a CSV (header row naming RIDER_FIELDS) or a JSON list / {"riders": [...]} file opened in binary mode."""
+    if fmt == 'csv':
+        return [
+            {key: value for key, value in row.items() if key in RIDER_FIELDS and value not in (None, '')}
+            for row in csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+        ]
+    if fmt == 'json':
+        data = json.load(codecs.getreader('utf-8-sig')(stream))
+        rows = data.get('riders') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError('JSON must be a list of riders or {"riders": [...]}')
+        return rows
+    raise ValueError('format must be "csv" or "json"')
+
+
+def hash_passwords(passwords, workers=None, pool=None):
+    """
+    make_password for every entry. Hashing is CPU bound, so it runs in a pool of
+    processes rather than threads: pool (a long-lived PasswordHashPool) when given,
+    else one started for this call. workers=0 hashes in this process.
+    """
+    if not passwords:
+        return []
+    if workers == 0:
+        return list(map(make_password, passwords))
+    if pool is not None:
+        return pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (pool.workers * 4)))
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_hash_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def allocate_usernames(bases):
+    """
+    Unique usernames for a list of bases. The usernames already taken are read with
+    one indexed prefix query per USERNAME_LOOKUP_BATCH distinct bases, and the
+    suffixes are handed out here rather than with a query per base.
+    """
+    distinct = list(dict.fromkeys(bases))
+    existing = set()
+    for start in range(0, len(distinct), USERNAME_LOOKUP_BATCH):
+        existing.update(name.lower() for name in usernames_starting_with(distinct[start:start + USERNAME_LOOKUP_BATCH]))
+    highest = highest_username_suffixes(set(distinct), existing)
+
+    next_suffix = {base: highest[base] + 1 if base in highest else 0 for base in distinct}
+    taken = existing
+    usernames = []
+    for base in bases:
+        while True:
+            suffix = next_suffix[base]
+            next_suffix[base] += 1
+            username = f'{base}{suffix}' if suffix else base
+            # johnsmith1 can be both the second "johnsmith" and the first "johnsmith1"
+            if username not in taken:
+                break
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def _allocate_free_rider_ids(count):
+    """Pre-allocated rider_ids, replacing any that a random id from before the allocator already holds."""
+    rider_ids = allocate_rider_ids(count)
+    while True:
+        clashes = set(Profile.objects.filter(rider_id__in=rider_ids).values_list('rider_id', flat=True))
+        if not clashes:
+            return rider_ids
+        replacements = iter(allocate_rider_ids(len(clashes)))
+        rider_ids = [next(replacements) if rider_id in clashes else rider_id for rider_id in rider_ids]
+
+
+def _provision_chunk(chunk, passwords, results):
+    registered = registered_emails(data['email'] for _, data in chunk)
+
+    rows = []
+    for (index, data), password in zip(chunk, passwords):
+        if data['email'] in registered:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'email': ['This email address is already registered.']}}
+        else:
+            rows.append((index, data, password))
+    if not rows:
+        return 0
+
+    bases = [
+        ((data['first_name'] + data['last_name']).lower().replace(' ', '')[:140] or 'user')
+        for _, data, _ in rows
+    ]
+    try:
+        with transaction.atomic():
+            usernames = allocate_usernames(bases)
+            rider_ids = _allocate_free_rider_ids(len(rows))
+            users = [
+                User(username=username, email=data['email'], password=password,
+                     first_name=data['first_name'], last_name=data['last_name'])
+                for username, (_, data, password) in zip(usernames, rows)
+            ]
+            # bulk_create skips create_user_profile, so the related rows are written here too
+            User.objects.bulk_create(users)
+            # MySQL does not return ids from bulk inserts
+            user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+            for user in users:
+                user.pk = user_ids[user.username]
+
+            Profile.objects.bulk_create([
+                Profile(user=user, rider_id=rider_id, location=data.get('location', ''))
+                for user, rider_id, (_, data, _) in zip(users, rider_ids, rows)
+            ])
+            RiderInfo.objects.bulk_create([
+                RiderInfo(rider_id=rider_id, user=user, email=user.email, username=user.username)
+                for user, rider_id in zip(users, rider_ids)
+            ])
+            RiderBalance.objects.bulk_create([RiderBalance(user=user) for user in users])
+    except IntegrityError as e:
+        # e.g. a registration took one of the usernames meanwhile; the chunk can simply be resubmitted
+        print(f"CRITICAL: Bulk rider provisioning chunk failed: {e}")
+        for index, _, _ in rows:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': ['Could not be saved, please retry.']}}
+        return 0
+
+    for (index, _, _), user, rider_id in zip(rows, users, rider_ids):
+        results[index] = {'index': index, 'status': 'created', 'rider_id': rider_id, 'username': user.username, 'user_id': user.pk}
+    return len(rows)
+
+
+def provision_riders(rows, workers=None, chunk_size=PROVISION_CHUNK_SIZE, pool=None):
+    """
+    Create riders (User, Profile, RiderInfo and RiderBalance rows) in bulk.
+    Rows are validated, passwords hashed in a process pool (see hash_passwords), and
+    each chunk is written with a handful of bulk INSERTs in its own transaction.
+    Returns (created count, one result per input row).
+    """
+    results = [None] * len(rows)
+    valid = []
+    seen = set()
+    for index, row in enumerate(rows):
+        serializer = RiderRowSerializer(data=row if isinstance(row, dict) else {})
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+        elif serializer.validated_data['email'] in seen:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'email': ['Appears more than once in this file.']}}
+        else:
+            seen.add(serializer.validated_data['email'])
+            valid.append((index, serializer.validated_data))
+
+    passwords = hash_passwords([data['password'] for _, data in valid], workers, pool)
+
+    created = 0
+    for start in range(0, len(valid), chunk_size):
+        created += _provision_chunk(valid[start:start + chunk_size], passwords[start:start + chunk_size], results)
+    return created, results
@@ -0,0 +1,179 @@
+import datetime
+import decimal
+import re
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional accelerator; both classes then behave exactly like their parents
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional; without it application/msgpack is simply not offered
+    msgpack = None
+
+
+if orjson is not None:
+    # Dates, times and dataclasses go through DRF's encoder so they come out as JSONRenderer writes them
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+# Integers past 64 bits: orjson reads them as floats where json keeps them exact
+_LONG_INTEGER = re.compile(rb'\d{19}')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson when it is installed.
+
+    Output is byte-identical to JSONRenderer for API responses: Decimal and
+    anything else orjson does not encode natively go through DRF's
+    JSONEncoder.default. Indented output, settings that change the layout, and
+    values orjson rejects (e.g. integers past 64 bits) use the stdlib path.
+    Known differences in the fast path: floats that repr() writes with an
+    exponent (1e-05, 1e+16) come out as 1e-5 / 1e16, and NaN/Infinity become
+    null instead of raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (data is None or orjson is None or not self.compact or self.ensure_ascii or not self.strict
+                or self.get_indent(accepted_media_type or '', renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer: U+2028/U+2029 are valid JSON but break JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """
+    Drop-in JSONParser that decodes UTF-8 bodies with orjson when it is installed.
+    Bodies orjson refuses or could read differently (other charsets, integers
+    past 64 bits) go to the stdlib parser, so results and error messages match JSONParser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if (stream is None or orjson is None or not self.strict
+                or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8')):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if not _LONG_INTEGER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        # The stream is used up; give the stdlib parser the same bytes for its result or error
+        return super().parse(BytesIO(body), media_type, parser_context)
+
+
+# --- MessagePack ---
+# Type mapping (see API_SUMMARY_POSTMAN.md, "Binary responses"):
+#   Decimal  -> ext type 1: 1 signed byte scale, then the unscaled value as a big-endian
+#               two's-complement integer, i.e. Java's new BigDecimal(new BigInteger(rest), scale)
+#   datetime -> msgpack Timestamp extension (-1), always UTC; naive datetimes as ISO 8601 strings
+#   date     -> "YYYY-MM-DD" string, time -> "HH:MM:SS[.ffffff]" string
+#   UUID, lazy strings -> strings
+# Everything else maps to the msgpack type of the same name.
+MSGPACK_DECIMAL_EXT = 1
+
+
+def encode_decimal(value):
+    sign, digits, exponent = value.as_tuple()
+    if not isinstance(exponent, int) or not -128 <= exponent <= 127:
+        raise ValueError(f'{value} cannot be encoded as a msgpack decimal')
+    unscaled = int(''.join(map(str, digits)) or '0') * (-1 if sign else 1)
+    length = unscaled.bit_length() // 8 + 1
+    return (-exponent).to_bytes(1, 'big', signed=True) + unscaled.to_bytes(length, 'big', signed=True)
+
+
+def decode_decimal(data):
+    scale = int.from_bytes(data[:1], 'big', signed=True)
+    unscaled = int.from_bytes(data[1:], 'big', signed=True)
+    return decimal.Decimal(unscaled).scaleb(-scale)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return msgpack.ExtType(MSGPACK_DECIMAL_EXT, encode_decimal(obj))
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is None:
+            return obj.isoformat()
+        return msgpack.Timestamp.from_datetime(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, Promise)):
+        return force_str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} cannot be encoded as msgpack')
+
+
+def _msgpack_ext_hook(code, data):
+    if code == MSGPACK_DECIMAL_EXT:
+        return decode_decimal(data)
+    return msgpack.ExtType(code, data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    application/msgpack responses for bandwidth-sensitive clients.
+    Views that build rows themselves can ask for native Decimal/date/datetime
+    values (see wants_native_types) instead of the strings JSON needs.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    native_types = True
+    available = msgpack is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """Accepts application/msgpack request bodies, decoding the same type mapping the renderer writes."""
+    media_type = 'application/msgpack'
+    available = msgpack is not None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, ext_hook=_msgpack_ext_hook, timestamp=3)
+        except (ValueError, TypeError) as exc:
+            # msgpack's ExtraData, FormatError and StackError are all ValueErrors
+            raise ParseError(f'MessagePack parse error - {exc}')
+
+
+def wants_native_types(request):
+    """True when the negotiated renderer encodes Decimal/date/datetime itself (e.g. msgpack)."""
+    return getattr(getattr(request, 'accepted_renderer', None), 'native_types', False)
+
+
+class AvailableContentNegotiation(DefaultContentNegotiation):
+    """Leaves out renderers/parsers whose optional library is not installed (406/415 instead of a 500)."""
+
+    def select_parser(self, request, parsers):
+        return super().select_parser(request, [parser for parser in parsers if getattr(parser, 'available', True)])
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return super().select_renderer(
+            request, [renderer for renderer in renderers if getattr(renderer, 'available', True)], format_suffix
+        )
@@ -0,0 +1,81 @@
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+
+# rider_ids are 8 decimal digits
+RIDER_ID_SPACE = 10 ** 8
+_HALF = 10 ** 4
+FEISTEL_ROUNDS = 6
+
+
+class RiderIdSpaceExhausted(Exception):
+    pass
+
+
+def _default_key():
+    # Keep RIDER_ID_KEY fixed once set: changing it reshuffles which ids future counters map to
+    return getattr(settings, 'RIDER_ID_KEY', None) or settings.SECRET_KEY
+
+
+def _round_value(key, round_number, half):
+    digest = hmac.new(key, f'{round_number}:{half}'.encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], 'big') % _HALF
+
+
+def permute(counter, key=None):
+    """
+    Map a counter in [0, 10^8) to an 8-digit id with a keyed Feistel network.
+    The map is a bijection, so distinct counters always give distinct ids,
+    while consecutive counters give ids that look random.
+    """
+    if not 0 <= counter < RIDER_ID_SPACE:
+        raise RiderIdSpaceExhausted(f'Counter {counter} is outside the 8-digit rider_id space')
+    key = (key or _default_key()).encode()
+    left, right = divmod(counter, _HALF)
+    for round_number in range(FEISTEL_ROUNDS):
+        left, right = right, (left + _round_value(key, round_number, right)) % _HALF
+    return f'{left * _HALF + right:08d}'
+
+
+def unpermute(rider_id, key=None):
+    """Inverse of permute: the counter a rider_id was issued from."""
+    key = (key or _default_key()).encode()
+    left, right = divmod(int(rider_id), _HALF)
+    for round_number in reversed(range(FEISTEL_ROUNDS)):
+        left, right = (right - _round_value(key, round_number, left)) % _HALF, left
+    return left * _HALF + right
+
+
+def reserve_counters(count=1):
+    """
+    Take the next count values of the rider_id counter (one UPDATE and one SELECT).
+    The counter row stays locked until the surrounding transaction commits,
+    so concurrent registrations can never receive the same values.
+    """
+    # Imported here to avoid a circular import with accounts.models
+    from .models import RiderIdSequence
+
+    # No savepoint: inside registration's transaction a failure here aborts it anyway
+    with transaction.atomic(savepoint=False):
+        if not RiderIdSequence.objects.filter(pk=1).update(next_value=F('next_value') + count):
+            RiderIdSequence.objects.get_or_create(pk=1)
+            RiderIdSequence.objects.filter(pk=1).update(next_value=F('next_value') + count)
+        end = RiderIdSequence.objects.values_list('next_value', flat=True).get(pk=1)
+
+    if end > RIDER_ID_SPACE:
+        raise RiderIdSpaceExhausted('All 8-digit rider_ids have been issued')
+    return range(end - count, end)
+
+
+def allocate_rider_ids(count):
+    """count unique rider_ids in O(count) time, without checking which ids exist."""
+    key = _default_key()
+    return [permute(counter, key) for counter in reserve_counters(count)]
+
+
+def allocate_rider_id():
+    return allocate_rider_ids(1)[0]
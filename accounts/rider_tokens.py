@@ -0,0 +1,95 @@
+import base64
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import authentication, exceptions
+
+
+# <user_id>.<rider_id>.<expires, unix seconds>.<HMAC-SHA256, base64url>
+TOKEN_SALT = b'accounts.rider_token|'
+TOKEN_TTL = 7 * 24 * 3600
+
+
+def _key():
+    # Changing RIDER_TOKEN_KEY (or SECRET_KEY when it is unset) invalidates every issued token
+    return (getattr(settings, 'RIDER_TOKEN_KEY', None) or settings.SECRET_KEY).encode()
+
+
+def _sign(payload):
+    digest = hmac.new(_key(), TOKEN_SALT + payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+
+class RiderToken:
+    """The claims of a verified token; RiderTokenAuthentication sets it as request.auth."""
+
+    def __init__(self, user_id, rider_id, expires_at):
+        self.user_id = user_id
+        self.rider_id = rider_id
+        self.expires_at = expires_at
+
+    def user(self):
+        """The token's User with only the pk loaded; other fields are deferred and cost a query each."""
+        return User.from_db(DEFAULT_DB_ALIAS, ('id',), (self.user_id,))
+
+
+def issue_rider_token(user_id, rider_id, ttl=None):
+    """A signed token naming the user and rider, valid for ttl seconds (RIDER_TOKEN_TTL by default)."""
+    if ttl is None:
+        ttl = getattr(settings, 'RIDER_TOKEN_TTL', TOKEN_TTL)
+    payload = f'{int(user_id)}.{rider_id}.{int(time.time()) + ttl}'
+    return f'{payload}.{_sign(payload)}'
+
+
+def verify_rider_token(token, now=None):
+    """
+    The RiderToken for a token from issue_rider_token. Pure CPU: one HMAC and no query.
+    Raises ValueError when the token is malformed, forged or expired.
+    """
+    payload, _, signature = token.rpartition('.')
+    if not payload or not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError('Invalid token.')
+    try:
+        user_id, rider_id, expires_at = payload.split('.')
+        user_id, expires_at = int(user_id), int(expires_at)
+    except ValueError:
+        raise ValueError('Invalid token.')
+    if expires_at <= (time.time() if now is None else now):
+        raise ValueError('Token has expired.')
+    return RiderToken(user_id, rider_id, expires_at)
+
+
+class RiderTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authorization: Rider <token>, as returned by the login API.
+    request.user is the token's user (pk only) and request.auth its RiderToken;
+    requests without the header stay anonymous, so raw rider_id callers keep working.
+    """
+    keyword = 'Rider'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            token = verify_rider_token(auth[1].decode('ascii'))
+        except (UnicodeError, ValueError) as e:
+            raise exceptions.AuthenticationFailed(str(e))
+        return token.user(), token
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+def authenticate_rider_request(request):
+    """
+    For views outside DRF: sets request.user and request.auth as RiderTokenAuthentication
+    does under DRF (AnonymousUser and None without the header). Raises AuthenticationFailed.
+    """
+    request.user, request.auth = RiderTokenAuthentication().authenticate(request) or (AnonymousUser(), None)
@@ -1,6 +1,57 @@
-from rest_framework import serializers
+import datetime
+import decimal
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from .models import Income,Expense,MutualFund
+from .email_directory import email_in_use, normalize_email
+
+
+USERNAME_ATTEMPTS = 3
+
+
+def usernames_starting_with(bases):
+    """Every username that begins with one of bases, ignoring case, in one query."""
+    # istartswith is LIKE 'base%' on MySQL, a range scan of the username index;
+    # startswith (LIKE BINARY) and regex (REGEXP BINARY) would scan all of auth_user.
+    # Case is ignored like the index's collation does: JohnSmith1 blocks johnsmith1 too.
+    query = Q()
+    for base in bases:
+        query |= Q(username__istartswith=base)
+    return User.objects.filter(query).values_list('username', flat=True)
+
+
+def highest_username_suffixes(bases, usernames):
+    """
+    {base: highest number n such that base + str(n) is among usernames, 0 for base itself}
+    for the bases that have any. Suffixes are compared as numbers, so johnsmith007 counts as 7.
+    """
+    highest = {}
+    for username in usernames:
+        username = username.lower()
+        digits_from = len(username.rstrip('0123456789'))
+        # johnsmith12 is johnsmith + 12, johnsmith1 + 2 and johnsmith12 + nothing
+        for end in range(digits_from, len(username) + 1):
+            base = username[:end]
+            if base in bases:
+                highest[base] = max(highest.get(base, 0), int(username[end:] or 0))
+    return highest
+
+
+def next_free_username(base):
+    """
+    base if nobody uses it yet, otherwise base followed by one more than the
+    highest numeric suffix taken. One indexed query, however many johnsmithN exist.
+    """
+    highest = highest_username_suffixes({base}, usernames_starting_with([base])).get(base)
+    if highest is None:
+        return base
+    return f"{base}{highest + 1}"
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,9 +75,11 @@ class UserSerializer(serializers.ModelSerializer):
         """
         Check that the email is not already in use.
         """
-        if User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("This email address is already registered. Please use a different email.")
-        return value.lower()  # Store email in lowercase
+        if email_in_use(value):
+            raise serializers.ValidationError(
+                "This email address is already registered. Please use a different email.", code='unique'
+            )
+        return normalize_email(value)  # Store email in lowercase
     
     def validate_password(self, value):
         """
@@ -49,6 +102,8 @@ class UserSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """
         Custom create method to auto-generate a unique username.
+        The user, profile, rider info and balance rows are written in one
+        transaction; the username's uniqueness is enforced by the database.
         """
         # Remove confirm_password from validated_data as it's not needed for user creation
         validated_data.pop('confirm_password', None)
@@ -57,27 +112,27 @@ class UserSerializer(serializers.ModelSerializer):
         last_name = validated_data.get('last_name', '')
         
         # Create a base username, e.g., "johnsmith"
-        base_username = (first_name + last_name).lower().replace(' ', '')
+        base_username = (first_name + last_name).lower().replace(' ', '')[:140]
         if not base_username:
             # Fallback for empty names
             base_username = "user"
-            
-        username = base_username
-        counter = 1
-        # Check for uniqueness and append a number if it exists
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-        
-        # Create the user with the guaranteed unique username
-        user = User.objects.create_user(
-            username=username,
-            email=validated_data.get('email', ''),
-            password=validated_data['password'],
-            first_name=first_name,
-            last_name=last_name
-        )
-        return user
+
+        with transaction.atomic():
+            for attempt in range(USERNAME_ATTEMPTS):
+                username = next_free_username(base_username)
+                try:
+                    # The savepoint lets a concurrent registration that took the same name be retried
+                    with transaction.atomic():
+                        return User.objects.create_user(
+                            username=username,
+                            email=validated_data.get('email', ''),
+                            password=validated_data['password'],
+                            first_name=first_name,
+                            last_name=last_name
+                        )
+                except IntegrityError:
+                    if attempt == USERNAME_ATTEMPTS - 1:
+                        raise
         
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -95,10 +150,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
         # Handle profile data separately
         profile_data = validated_data.pop('profile', {})
         
-        # Update user fields
+        # Update user fields; only those, as the resolved user's others may come from a stale cache
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
         
         # Update profile fields
         if profile_data:
@@ -125,9 +181,9 @@ class ChangeEmailSerializer(serializers.Serializer):
 
     def validate_new_email(self, value):
         # Check if the new email is already being used by another account
-        if User.objects.filter(email__iexact=value).exists():
+        if email_in_use(value):
             raise serializers.ValidationError("This email is already in use.")
-        return value
+        return normalize_email(value)
     
 class ChangePasswordSerializer(serializers.Serializer):
     """
@@ -162,7 +218,143 @@ class ExpenseSerializer(serializers.ModelSerializer):
         model = Expense
         fields = ['id', 'category', 'amount', 'date', 'notes', 'created_at']
 
+class TransactionSerializer(serializers.Serializer):
+    """
+    Read-only representation of one merged Income/Expense row from the
+    transaction history API. Rows come from .values() so no model is built.
+    Incomes carry 'source' and expenses 'category', like the recent list.
+    """
+    id = serializers.IntegerField()
+    type = serializers.CharField(source='kind')
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    date = serializers.DateField()
+    notes = serializers.CharField(allow_null=True)
+    created_at = serializers.DateTimeField()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['source' if instance['kind'] == 'income' else 'category'] = instance['label']
+        return data
+
 class MutualFundSerializer(serializers.ModelSerializer):
     class Meta:
         model = MutualFund
-        fields = ['id', 'name', 'fund_type', 'invested_amount', 'current_value', 'created_at']
\ No newline at end of file
+        fields = ['id', 'name', 'fund_type', 'invested_amount', 'current_value', 'created_at']
+
+
+class ValuesListSerializer:
+    """
+    Fast read-only counterpart of serializer_class(queryset, many=True).data for list endpoints.
+
+    Rows are read with .values_list() (no model instances), and each column goes
+    through a converter compiled once from the matching DRF field, so the output
+    is exactly what the DRF serializer produces. Fields without a fast converter
+    fall back to their own to_representation.
+
+    native=True keeps Decimal, date and datetime values as Python objects (quantized
+    and timezone-adjusted like the strings would be) for renderers that encode
+    them natively, such as msgpack. fields= limits both the output keys and the
+    columns read to a subset of the serializer's field names.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._fields = None
+        self._compiled = {}
+
+    @property
+    def fields(self):
+        # Built on first use: ModelSerializer fields need the app registry
+        if self._fields is None:
+            self._fields = [field for field in self.serializer_class().fields.values() if not field.write_only]
+        return self._fields
+
+    @property
+    def field_names(self):
+        return [field.field_name for field in self.fields]
+
+    def _selected(self, fields):
+        return [
+            index for index, field in enumerate(self.fields)
+            if fields is None or field.field_name in fields
+        ]
+
+    def values_list(self, queryset, fields=None):
+        return queryset.values_list(*(self.fields[index].source for index in self._selected(fields)))
+
+    def serialize(self, rows, native=False, fields=None):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = self._compiled.get((tz, native))
+        if converters is None:
+            converters = self._compiled[tz, native] = [self._converter(field, tz, native) for field in self.fields]
+        columns = [(self.fields[index].field_name, converters[index]) for index in self._selected(fields)]
+        return [
+            {name: None if value is None else convert(value) for (name, convert), value in zip(columns, row)}
+            for row in rows
+        ]
+
+    def data(self, queryset, native=False, fields=None):
+        return self.serialize(self.values_list(queryset, fields), native, fields)
+
+    async def adata(self, queryset, native=False, fields=None):
+        """data() for async views: the rows are read with the async ORM."""
+        return self.serialize([row async for row in self.values_list(queryset, fields)], native, fields)
+
+    @staticmethod
+    def _converter(field, tz, native=False):
+        if isinstance(field, serializers.DecimalField):
+            coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            if native and field.decimal_places is not None:
+                exponent = decimal.Decimal('.1') ** field.decimal_places
+                return lambda value: decimal.Decimal(value).quantize(exponent, rounding=field.rounding)
+            if (coerce and not field.localize and field.decimal_places is not None
+                    and not getattr(field, 'normalize_output', False)):
+                exponent = decimal.Decimal('.1') ** field.decimal_places
+                context = decimal.getcontext().copy()
+                if field.max_digits is not None:
+                    context.prec = field.max_digits
+                rounding = field.rounding
+
+                def convert_decimal(value):
+                    if not isinstance(value, decimal.Decimal):
+                        value = decimal.Decimal(str(value).strip())
+                    return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+                return convert_decimal
+
+        elif isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            if isinstance(output_format, str) and output_format.lower() == ISO_8601:
+                field_tz = getattr(field, 'timezone', tz)
+
+                def convert_datetime(value):
+                    if isinstance(value, str):
+                        return value
+                    if field_tz is not None:
+                        value = value.astimezone(field_tz) if timezone.is_aware(value) else timezone.make_aware(value, field_tz)
+                    elif timezone.is_aware(value):
+                        value = timezone.make_naive(value, datetime.timezone.utc)
+                    if native:
+                        return value
+                    value = value.isoformat()
+                    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+                return convert_datetime
+
+        elif isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if native:
+                return lambda value: value
+            if isinstance(output_format, str) and output_format.lower() == ISO_8601:
+                return lambda value: value if isinstance(value, str) else value.isoformat()
+
+        elif isinstance(field, serializers.IntegerField):
+            return int
+
+        elif type(field) is serializers.CharField:
+            return str
+
+        return field.to_representation
+
+
+fast_income_list = ValuesListSerializer(IncomeSerializer)
+fast_expense_list = ValuesListSerializer(ExpenseSerializer)
+fast_mutual_fund_list = ValuesListSerializer(MutualFundSerializer)
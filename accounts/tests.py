@@ -1,3 +1,1442 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework.views import APIView
+
+from .models import Income, Expense, MutualFund, Profile, RiderInfo, RiderBalance, DailySummary, RiderIdSequence
+from .market_data import MarketDataCache
+from .market_stream import MarketBroadcaster, market_event_stream
+from .password_pool import PasswordHashPool, PasswordPoolBusy, PooledPBKDF2PasswordHasher
+from .rider_cache import rider_resolver
+from .rider_tokens import issue_rider_token, verify_rider_token
+from .provisioning import provision_riders, read_riders
+from .renderers import (
+    FastJSONParser, FastJSONRenderer, MessagePackParser, MessagePackRenderer,
+    decode_decimal, encode_decimal, msgpack,
+)
+from .serializers import (
+    IncomeSerializer, ExpenseSerializer, MutualFundSerializer,
+    fast_income_list, fast_expense_list, fast_mutual_fund_list, next_free_username,
+)
+from .rider_ids import allocate_rider_ids, permute, unpermute
+
+
+def create_rider(email='rider@example.com', password='testpass123'):
+    """Create a user through the normal path so the signals run."""
+    user = User.objects.create_user(
+        username=email.split('@')[0], email=email, password=password,
+        first_name='Test', last_name='Rider',
+    )
+    return user, user.profile.rider_id
+
+
+class RiderBalanceTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+
+    def assertBalance(self, income, expense):
+        balance = RiderBalance.objects.get(pk=self.user.pk)
+        self.assertEqual(balance.total_income, Decimal(income))
+        self.assertEqual(balance.total_expense, Decimal(expense))
+        self.assertEqual(balance.total_saving, Decimal(income) - Decimal(expense))
+
+    def test_rollup_created_with_user(self):
+        self.assertBalance('0', '0')
+
+    def test_create_edit_delete_keep_rollup_in_sync(self):
+        income = Income.objects.create(user=self.user, source='Salary', amount=Decimal('1000.00'), date=date(2026, 1, 1))
+        expense = Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('150.50'), date=date(2026, 1, 2))
+        self.assertBalance('1000.00', '150.50')
+
+        income = Income.objects.get(pk=income.pk)
+        income.amount = Decimal('1200.00')
+        income.save()
+        self.assertBalance('1200.00', '150.50')
+
+        expense.delete()
+        self.assertBalance('1200.00', '0')
+
+    def test_dashboard_builds_missing_rollup(self):
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('500.00'), date=date(2026, 1, 1))
+        RiderBalance.objects.filter(pk=self.user.pk).delete()
+
+        response = self.client.get('/api/dashboard/', {'rider_id': self.rider_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.json()['total_income']), Decimal('500.00'))
+        self.assertBalance('500.00', '0')
+
+    def test_rebuild_command_verifies_and_repairs(self):
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('300.00'), date=date(2026, 1, 1))
+        RiderBalance.objects.filter(pk=self.user.pk).update(total_income=Decimal('1.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rider_balances', '--verify', stdout=StringIO())
+
+        call_command('rebuild_rider_balances', stdout=StringIO())
+        call_command('rebuild_rider_balances', '--verify', stdout=StringIO())
+        self.assertBalance('300.00', '0')
+
+    def test_rebuild_command_upserts_without_a_conflict_target(self):
+        # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target, and Django rejects unique_fields there
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('300.00'), date=date(2026, 1, 1))
+        RiderBalance.objects.all().delete()  # SQLite has no target-less upsert, so leave nothing to conflict with
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            call_command('rebuild_rider_balances', stdout=StringIO())
+        self.assertBalance('300.00', '0')
+
+
+class DailySummaryTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+
+    def test_summary_tracks_create_move_and_delete(self):
+        first = Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('100.00'), date=date(2026, 1, 5))
+        Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('50.00'), date=date(2026, 1, 5))
+
+        bucket = DailySummary.objects.get(user=self.user, day=date(2026, 1, 5), kind='expense', category='Fuel')
+        self.assertEqual(bucket.total, Decimal('150.00'))
+        self.assertEqual(bucket.entry_count, 2)
+
+        first = Expense.objects.get(pk=first.pk)
+        first.category = 'Food'
+        first.save()
+        bucket.refresh_from_db()
+        self.assertEqual(bucket.total, Decimal('50.00'))
+        self.assertEqual(bucket.entry_count, 1)
+
+        first.delete()
+        self.assertFalse(DailySummary.objects.filter(category='Food').exists())
+
+    def test_rebuild_command_verifies_and_repairs_summaries(self):
+        Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('100.00'), date=date(2026, 1, 5))
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('900.00'), date=date(2026, 1, 6))
+        call_command('rebuild_rider_balances', '--verify', stdout=StringIO())
+
+        DailySummary.objects.filter(kind='expense').update(total=Decimal('1.00'))
+        DailySummary.objects.create(user=self.user, day=date(2026, 1, 7), kind='income', category='Bonus',
+                                    total=Decimal('5.00'), entry_count=1)
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 daily summaries are out of date'):
+            call_command('rebuild_rider_balances', '--verify', stdout=out)
+        self.assertIn("'Fuel'", out.getvalue())
+
+        call_command('rebuild_rider_balances', stdout=StringIO())
+        call_command('rebuild_rider_balances', '--verify', stdout=StringIO())
+        self.assertEqual(
+            set(DailySummary.objects.values_list('kind', 'category', 'total')),
+            {('expense', 'Fuel', Decimal('100.00')), ('income', 'Salary', Decimal('900.00'))},
+        )
+
+    def test_analytics_groups_by_month_and_category(self):
+        self.client.post('/api/income/add/', {
+            'rider_id': self.rider_id, 'source': 'Salary', 'amount': '1000.00', 'date': '2026-01-01',
+        }, content_type='application/json')
+        self.client.post('/api/expense/add/', {
+            'rider_id': self.rider_id, 'category': 'Fuel', 'amount': '200.00', 'date': '2026-02-10',
+        }, content_type='application/json')
+        Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('99.00'), date=date(2025, 12, 31))
+
+        response = self.client.get('/api/analytics/', {
+            'rider_id': self.rider_id, 'start': '2026-01-01', 'end': '2026-12-31',
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([point['period'] for point in data['series']], ['2026-01', '2026-02'])
+        self.assertEqual(Decimal(data['totals']['expense']), Decimal('200.00'))
+        self.assertEqual(Decimal(data['totals']['saving']), Decimal('800.00'))
+        self.assertEqual(
+            [(c['kind'], c['category'], c['count']) for c in data['by_category']],
+            [('expense', 'Fuel', 1), ('income', 'Salary', 1)],
+        )
+
+    def test_analytics_rejects_bad_dates(self):
+        response = self.client.get('/api/analytics/', {'rider_id': self.rider_id, 'start': '01/01/2026'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TransactionHistoryTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        created_at = timezone.now()
+        # Same date and created_at everywhere, so ordering falls through to type and id
+        for i in range(3):
+            Income.objects.create(user=self.user, source='Salary', amount=Decimal('100.00') * (i + 1),
+                                  date=date(2026, 3, 1), created_at=created_at)
+            Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('10.00') * (i + 1),
+                                   date=date(2026, 3, 1), created_at=created_at)
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('5.00'), date=date(2026, 2, 1))
+
+    def fetch_all(self, **params):
+        seen, cursor = [], None
+        while True:
+            query = {'rider_id': self.rider_id, 'limit': 2, **params}
+            if cursor:
+                query['cursor'] = cursor
+            data = self.client.get('/api/transactions/', query).json()
+            seen.extend((tx['type'], tx['id']) for tx in data['transactions'])
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                return seen
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen = self.fetch_all()
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        self.assertEqual(seen[-1][0], 'expense')
+        self.assertEqual([kind for kind, _ in seen[:3]], ['income'] * 3)
+
+    def test_filters(self):
+        self.assertEqual(len(self.fetch_all(type='income')), 3)
+        self.assertEqual(len(self.fetch_all(category='Fuel')), 3)
+        self.assertEqual(len(self.fetch_all(min_amount='20', max_amount='100')), 3)
+        self.assertEqual(len(self.fetch_all(end='2026-02-28')), 1)
+
+    def test_rejects_tampered_cursor(self):
+        response = self.client.get('/api/transactions/', {'rider_id': self.rider_id, 'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(connection.vendor == 'mysql', 'Query plan checks target the production MySQL backend')
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN on every query the per-rider endpoints issue and fails if a
+    per-rider table is read with a full table scan or needs a filesort.
+    """
+    PER_RIDER_TABLES = {
+        'accounts_income', 'accounts_expense', 'accounts_mutualfund',
+        'accounts_dailysummary', 'accounts_riderbalance', 'accounts_profile',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        # Enough riders that the optimizer prefers the per-user indexes over scanning
+        users = [
+            User.objects.create(username=f'plan{i}', email=f'plan{i}@example.com')
+            for i in range(20)
+        ]
+        cls.rider_id = users[0].profile.rider_id
+
+        incomes, expenses, funds, summaries = [], [], [], []
+        for user in users:
+            for day in range(1, 31):
+                when = date(2025, 1, day)
+                incomes.append(Income(user=user, source='Salary', amount=Decimal('100.00'), date=when))
+                expenses.append(Expense(user=user, category='Fuel', amount=Decimal('10.00'), date=when))
+                funds.append(MutualFund(user=user, name=f'Fund {day}', fund_type='Equity',
+                                        invested_amount=Decimal('1000.00'), current_value=Decimal('1100.00')))
+                summaries.append(DailySummary(user=user, day=when, kind='expense', category='Fuel',
+                                              total=Decimal('10.00'), entry_count=1))
+        Income.objects.bulk_create(incomes)
+        Expense.objects.bulk_create(expenses)
+        MutualFund.objects.bulk_create(funds)
+        DailySummary.objects.bulk_create(summaries)
+
+        with connection.cursor() as cursor:
+            for table in cls.PER_RIDER_TABLES:
+                cursor.execute(f'ANALYZE TABLE {table}')
+                cursor.fetchall()
+
+    def plan_problems(self, sql):
+        problems = []
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql)
+            columns = [column[0] for column in cursor.description]
+            for row in cursor.fetchall():
+                row = dict(zip(columns, row))
+                if row['table'] not in self.PER_RIDER_TABLES:
+                    # Derived tables such as <union1,2> only ever hold one page of rows
+                    continue
+                if row['type'] == 'ALL':
+                    problems.append(f"full scan of {row['table']}: {sql}")
+                if 'filesort' in (row['Extra'] or ''):
+                    problems.append(f"filesort on {row['table']}: {sql}")
+        return problems
+
+    def assertIndexedPlans(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'rider_id': self.rider_id, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+
+        problems = []
+        for query in queries.captured_queries:
+            if query['sql'].lstrip('(').upper().startswith('SELECT'):
+                problems.extend(self.plan_problems(query['sql']))
+        self.assertEqual(problems, [])
+        return response
+
+    def test_endpoint_query_plans(self):
+        endpoints = [
+            ('/api/dashboard/', {}),
+            ('/api/transactions/recent/', {}),
+            ('/api/transactions/', {}),
+            ('/api/transactions/', {'type': 'expense', 'start': '2025-01-10'}),
+            ('/api/analytics/', {'start': '2025-01-01', 'end': '2025-01-15'}),
+            ('/api/funds/', {}),
+            ('/api/portfolio/summary/', {}),
+        ]
+        for url, params in endpoints:
+            with self.subTest(url=url, params=params):
+                self.assertIndexedPlans(url, params)
+
+    def test_deep_history_page_plan(self):
+        cursor = self.assertIndexedPlans('/api/transactions/', {'limit': 25}).json()['next_cursor']
+        self.assertIndexedPlans('/api/transactions/', {'limit': 25, 'cursor': cursor})
+
+
+class TransactionBatchTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+
+    def post_batch(self, transactions):
+        return self.client.post('/api/transactions/batch/', {
+            'rider_id': self.rider_id, 'transactions': transactions,
+        }, content_type='application/json')
+
+    def test_inserts_valid_rows_and_reports_invalid_ones(self):
+        response = self.post_batch([
+            {'type': 'income', 'source': 'Salary', 'amount': '1000.00', 'date': '2026-01-01'},
+            {'type': 'expense', 'category': 'Fuel', 'amount': 'lots', 'date': '2026-01-02'},
+            {'type': 'expense', 'category': 'Fuel', 'amount': '40.00', 'date': '2026-01-02'},
+            {'type': 'transfer', 'amount': '1.00'},
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'error', 'created', 'error'])
+        self.assertIn('amount', results[1]['errors'])
+
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+        balance = RiderBalance.objects.get(pk=self.user.pk)
+        self.assertEqual(balance.total_saving, Decimal('960.00'))
+        bucket = DailySummary.objects.get(user=self.user, kind='expense', category='Fuel')
+        self.assertEqual((bucket.total, bucket.entry_count), (Decimal('40.00'), 1))
+
+    def test_adds_to_existing_summary_buckets(self):
+        Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('10.00'), date=date(2026, 1, 2))
+        response = self.post_batch([
+            {'type': 'expense', 'category': 'Fuel', 'amount': '5.00', 'date': '2026-01-02'},
+            {'type': 'expense', 'category': 'Fuel', 'amount': '5.00', 'date': '2026-01-02'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        bucket = DailySummary.objects.get(user=self.user, kind='expense', category='Fuel')
+        self.assertEqual((bucket.total, bucket.entry_count), (Decimal('20.00'), 3))
+
+    def test_reports_ids_where_bulk_inserts_return_none(self):
+        # MySQL: bulk_create leaves pk unset, so the ids are read back
+        other, _ = create_rider('other@example.com')
+        Income.objects.create(user=other, source='Tips', amount=Decimal('1.00'), date=date(2026, 1, 1))
+        rows = [
+            {'type': 'income', 'source': 'Salary', 'amount': '1000.00', 'date': '2026-01-01'},
+            {'type': 'expense', 'category': 'Fuel', 'amount': '40.00', 'date': '2026-01-02'},
+            {'type': 'income', 'source': 'Bonus', 'amount': '50.00', 'date': '2026-01-03'},
+        ]
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False):
+            response = self.post_batch(rows)
+        self.assertEqual(response.status_code, 201)
+        results = response.json()['results']
+        self.assertEqual(Income.objects.get(pk=results[0]['id']).source, 'Salary')
+        self.assertEqual(Expense.objects.get(pk=results[1]['id']).category, 'Fuel')
+        self.assertEqual(Income.objects.get(pk=results[2]['id']).source, 'Bonus')
+
+
+class TransactionExportTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('1000.00'), date=date(2026, 1, 1))
+        Expense.objects.create(user=self.user, category='Fuel', amount=Decimal('40.00'), date=date(2026, 1, 3), notes='Full tank')
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('12.50'), date=date(2025, 12, 31))
+
+    def export(self, **params):
+        response = self.client.get('/api/transactions/export/', {'rider_id': self.rider_id, **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_is_merged_oldest_first(self):
+        lines = self.export(format='csv').splitlines()
+        self.assertEqual(lines[0], 'type,id,date,created_at,source,category,amount,notes')
+        self.assertEqual([line.split(',')[2] for line in lines[1:]], ['2025-12-31', '2026-01-01', '2026-01-03'])
+        self.assertTrue(lines[3].endswith(',Fuel,40.00,Full tank'))
+
+    def test_ndjson_export_pages_through_everything(self):
+        with mock.patch('accounts.views.EXPORT_CHUNK_SIZE', 1):
+            rows = [json.loads(line) for line in self.export(format='ndjson', type='expense').splitlines()]
+        self.assertEqual([(row['category'], row['amount']) for row in rows], [('Food', '12.50'), ('Fuel', '40.00')])
+
+    def test_rejects_unknown_format(self):
+        response = self.client.get('/api/transactions/export/', {'rider_id': self.rider_id, 'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RiderResolverTests(TestCase):
+    def setUp(self):
+        rider_resolver.clear()
+        cache.clear()
+        self.user, self.rider_id = create_rider()
+
+    def test_writes_through_a_stale_cached_user_keep_other_changes(self):
+        rider_resolver.resolve(self.rider_id)
+        # Changed behind the cache's back, as another process's write looks for local_ttl seconds
+        User.objects.filter(pk=self.user.pk).update(is_active=False, last_name='Elsewhere')
+
+        response = self.client.post('/api/personal-info/update/', {'rider_id': self.rider_id, 'first_name': 'Fresh'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        rider_resolver.resolve(self.rider_id)
+        User.objects.filter(pk=self.user.pk).update(first_name='Again')
+        response = self.client.patch('/api/profile/', {'rider_id': self.rider_id, 'location': 'Pune', 'last_name': 'Patched'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        rider_resolver.resolve(self.rider_id)
+        User.objects.filter(pk=self.user.pk).update(last_name='Later')
+        response = self.client.post('/api/profile/change-email/', {
+            'rider_id': self.rider_id, 'new_email': 'moved@example.com', 'current_password': 'testpass123',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.is_active, user.first_name, user.last_name, user.email),
+                         (False, 'Again', 'Later', 'moved@example.com'))
+        self.assertEqual(user.rider_info.email, 'moved@example.com')
+
+    def test_second_lookup_is_served_from_cache(self):
+        self.assertEqual(rider_resolver.resolve(self.rider_id).pk, self.user.pk)
+        with self.assertNumQueries(0):
+            user = rider_resolver.resolve(self.rider_id)
+        self.assertEqual(user.email, self.user.email)
+        self.assertIsNone(rider_resolver.resolve('00000000'))
+
+    def test_resolved_user_has_every_core_field_in_place(self):
+        User.objects.filter(pk=self.user.pk).update(last_login=timezone.now())
+        stored = User.objects.get(pk=self.user.pk)
+        user = rider_resolver.resolve(self.rider_id)
+        for name in ('id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'date_joined', 'last_login'):
+            self.assertEqual(getattr(user, name), getattr(stored, name), name)
+
+    def test_shared_cache_is_used_after_local_expiry(self):
+        rider_resolver.resolve(self.rider_id)
+        rider_resolver.clear()
+        before = rider_resolver.stats()['shared_hits']
+        with self.assertNumQueries(0):
+            rider_resolver.resolve(self.rider_id)
+        self.assertEqual(rider_resolver.stats()['shared_hits'], before + 1)
+
+    def test_email_change_invalidates(self):
+        rider_resolver.resolve(self.rider_id)
+        response = self.client.post('/api/profile/change-email/', {
+            'rider_id': self.rider_id, 'new_email': 'new@example.com', 'current_password': 'testpass123',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rider_resolver.resolve(self.rider_id).email, 'new@example.com')
+
+    def test_resolved_user_saves_only_changed_fields(self):
+        user = rider_resolver.resolve(self.rider_id)
+        user.first_name = 'Changed'
+        user.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('testpass123'))
+
+    def test_deleted_account_no_longer_resolves(self):
+        rider_resolver.resolve(self.rider_id)
+        response = self.client.post('/api/profile/delete-account/', {
+            'rider_id': self.rider_id, 'current_password': 'testpass123',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(rider_resolver.resolve(self.rider_id))
+
+
+NSE_SAMPLE = {
+    'marketStatus': 'Open',
+    'data': [
+        {'index': name, 'last': value, 'variation': 1.5, 'percentChange': 0.1, 'open': value,
+         'high': value + 10, 'low': value - 10, 'previousClose': value - 1.5}
+        for name, value in (('NIFTY 50', 22000.0), ('NIFTY 100', 23000.0), ('NIFTY BANK', 48000.0))
+    ],
+}
+
+
+class StubNSEHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        if self.server.fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps(self.server.body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_nse(testcase):
+    """Serve a fake allIndices feed on a free local port for the duration of the test."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubNSEHandler)
+    server.hits, server.delay, server.fail = 0, 0, False
+    server.body = json.loads(json.dumps(NSE_SAMPLE))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    testcase.addCleanup(server.server_close)
+    testcase.addCleanup(server.shutdown)
+    server.url = f'http://127.0.0.1:{server.server_port}/api/allIndices'
+    return server
+
+
+class MarketDataCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = start_stub_nse(self)
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        self.stub.delay = 0.2
+        market = MarketDataCache(url=self.stub.url, ttl=60)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            payloads = list(pool.map(lambda _: market.get(), range(10)))
+
+        self.assertEqual(self.stub.hits, 1)
+        self.assertTrue(all(payload['nifty50']['value'] == 22000.0 for payload in payloads))
+        self.assertEqual(payloads[0]['bankNifty']['prevClose'], 47998.5)
+
+    def test_stale_data_is_served_while_refreshing(self):
+        market = MarketDataCache(url=self.stub.url, ttl=0, stale_ttl=60)
+        market.get()
+        self.stub.body['data'][0]['last'] = 22100.0
+
+        self.assertEqual(market.get()['nifty50']['value'], 22000.0)
+        deadline = time.monotonic() + 5
+        while market.stats()['upstream_calls'] < 2 or market._inflight is not None:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(self.stub.hits, 2)
+        self.assertEqual(market._entry[0]['nifty50']['value'], 22100.0)
+
+    def test_failures_fall_back_to_last_good_or_unavailable(self):
+        self.stub.fail = True
+        market = MarketDataCache(url=self.stub.url, ttl=0, error_ttl=0)
+        self.assertEqual(market.get()['marketStatus'], 'Unavailable')
+
+        self.stub.fail = False
+        self.assertEqual(market.get()['marketStatus'], 'Open')
+        self.stub.fail = True
+        market._entry = None
+        self.assertEqual(market.get()['marketStatus'], 'Open')
+        self.assertEqual(market.stats()['upstream_errors'], 2)
+
+    async def test_async_misses_share_one_upstream_call(self):
+        self.stub.delay = 0.2
+        market = MarketDataCache(url=self.stub.url, ttl=60)
+        payloads = await asyncio.gather(*(market.aget() for _ in range(10)))
+
+        self.assertEqual(self.stub.hits, 1)
+        self.assertTrue(all(payload == market.get() for payload in payloads))
+        self.assertEqual(payloads[0]['nifty50']['value'], 22000.0)
+
+        self.stub.fail = True
+        market.clear()
+        self.assertEqual((await market.aget())['marketStatus'], 'Unavailable')
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        self.stub.fail = True
+        market = MarketDataCache(url=self.stub.url, ttl=0, error_ttl=0, failure_threshold=3, reset_timeout=60)
+        payloads = [market.get() for _ in range(6)]
+
+        self.assertEqual(self.stub.hits, 3)
+        self.assertTrue(all(payload['marketStatus'] == 'Unavailable' for payload in payloads))
+        stats = market.stats()
+        self.assertEqual((stats['circuit'], stats['consecutive_failures']), ('open', 3))
+        self.assertEqual((stats['circuit_opened'], stats['short_circuited']), (1, 3))
+        self.assertGreater(stats['circuit_retry_in'], 0)
+
+    def test_open_circuit_serves_last_good_and_probes_after_reset(self):
+        market = MarketDataCache(url=self.stub.url, ttl=0, stale_ttl=0, error_ttl=0,
+                                 failure_threshold=2, reset_timeout=0.2)
+        market.get()
+        self.stub.fail = True
+        market.get(), market.get()
+        self.assertEqual(market.stats()['circuit'], 'open')
+        start = time.monotonic()
+        self.assertEqual(market.get()['nifty50']['value'], 22000.0)
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual(self.stub.hits, 3)
+
+        # A failed probe opens the circuit again at once
+        time.sleep(0.25)
+        market.get()
+        self.assertEqual((self.stub.hits, market.stats()['circuit']), (4, 'open'))
+
+        time.sleep(0.25)
+        self.stub.fail = False
+        self.stub.body['data'][0]['last'] = 22100.0
+        self.assertEqual(market.get()['nifty50']['value'], 22100.0)
+        stats = market.stats()
+        self.assertEqual((stats['circuit'], stats['consecutive_failures'], stats['probes']), ('closed', 0, 2))
+
+    def test_callers_wait_no_longer_than_the_budget(self):
+        self.stub.delay = 0.5
+        market = MarketDataCache(url=self.stub.url, ttl=60, wait_budget=0.1)
+        start = time.monotonic()
+        self.assertEqual(market.get()['marketStatus'], 'Unavailable')
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(market.stats()['over_budget'], 1)
+
+        # The call carried on and fills the cache for the next caller
+        deadline = time.monotonic() + 5
+        while market._inflight is not None:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(market.get()['marketStatus'], 'Open')
+        self.assertEqual(self.stub.hits, 1)
+
+    async def test_async_callers_wait_no_longer_than_the_budget(self):
+        self.stub.delay = 0.5
+        market = MarketDataCache(url=self.stub.url, ttl=60, wait_budget=0.1)
+        payloads = await asyncio.gather(market.aget(), market.aget())
+        self.assertEqual([payload['marketStatus'] for payload in payloads], ['Unavailable', 'Unavailable'])
+        await market._refresh_task
+        self.assertEqual((await market.aget())['marketStatus'], 'Open')
+        self.assertEqual(self.stub.hits, 1)
+
+    def test_slow_upstream_counts_as_a_failure(self):
+        self.stub.delay = 0.3
+        market = MarketDataCache(url=self.stub.url, ttl=0, error_ttl=0, timeout=0.1, failure_threshold=1)
+        self.assertEqual(market.get()['marketStatus'], 'Unavailable')
+        self.assertEqual(market.stats()['circuit'], 'open')
+
+
+class MarketStreamTests(SimpleTestCase):
+    async def test_stream_sends_snapshot_then_only_changes(self):
+        broadcaster = MarketBroadcaster(interval=3600)
+        broadcaster._poll = mock.AsyncMock()
+        broadcaster.publish({'marketStatus': 'Open', 'nifty50': {'value': 1}, 'bankNifty': {'value': 5}})
+
+        stream = market_event_stream(broadcaster, max_duration=5)
+        self.assertEqual(await stream.__anext__(), 'retry: 3000\n\n')
+        snapshot = await stream.__anext__()
+        self.assertTrue(snapshot.startswith('event: snapshot\n'))
+        self.assertIn('"bankNifty"', snapshot)
+
+        broadcaster.publish({'marketStatus': 'Open', 'nifty50': {'value': 2}, 'bankNifty': {'value': 5}})
+        self.assertEqual(await stream.__anext__(), 'event: update\ndata: {"nifty50": {"value": 2}}\n\n')
+        self.assertEqual(broadcaster.subscriber_count(), 1)
+
+        await stream.aclose()
+        self.assertEqual(broadcaster.subscriber_count(), 0)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get('/api/market-data/stream/')
+        self.assertEqual(response.status_code, 503)
+
+
+class RiderIdAllocatorTests(TestCase):
+    def test_permutation_is_a_bijection(self):
+        ids = [permute(counter, key='test-key') for counter in range(5000)]
+        self.assertEqual(len(set(ids)), 5000)
+        self.assertTrue(all(len(rider_id) == 8 and rider_id.isdigit() for rider_id in ids))
+        self.assertEqual([unpermute(rider_id, key='test-key') for rider_id in ids[:50]], list(range(50)))
+        self.assertNotEqual(ids[:5], sorted(ids[:5]))
+
+    def test_allocations_never_repeat(self):
+        first = allocate_rider_ids(100)
+        second = allocate_rider_ids(100)
+        self.assertEqual(len(set(first + second)), 200)
+
+    def test_registration_skips_an_id_taken_before_the_allocator(self):
+        # A legacy random id that happens to be the next permuted value
+        legacy_user = User.objects.create(username='legacy', email='legacy@example.com')
+        next_counter = RiderIdSequence.objects.get(pk=1).next_value
+        Profile.objects.filter(user=legacy_user).update(rider_id=permute(next_counter))
+
+        user, rider_id = create_rider('fresh@example.com')
+        self.assertNotEqual(rider_id, permute(next_counter))
+        self.assertEqual(RiderInfo.objects.get(user=user).rider_id, rider_id)
+
+
+class RegistrationTests(TestCase):
+    # Registration must not grow with the number of johnsmithN already taken
+    MAX_QUERIES = 16
+
+    def register(self, email):
+        return self.client.post('/api/register/', {
+            'email': email, 'password': 'testpass123', 'confirm_password': 'testpass123',
+            'first_name': 'John', 'last_name': 'Smith',
+        }, content_type='application/json')
+
+    def test_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as first:
+            response = self.register('john0@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['username'], 'johnsmith')
+
+        for n in range(1, 30):
+            User.objects.create(username=f'johnsmith{n}', email=f'taken{n}@example.com')
+
+        with CaptureQueriesContext(connection) as crowded:
+            response = self.register('john30@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['username'], 'johnsmith30')
+        self.assertEqual(len(crowded), len(first))
+        self.assertLessEqual(len(crowded), self.MAX_QUERIES)
+
+        user = User.objects.get(username='johnsmith30')
+        self.assertEqual(user.rider_info.rider_id, response.json()['rider_id'])
+        self.assertTrue(RiderBalance.objects.filter(user=user).exists())
+
+    def test_suffixes_are_compared_as_numbers(self):
+        for username in ('johnsmith', 'johnsmith007', 'johnsmith10', 'johnsmithers', 'JohnSmith12'):
+            User.objects.create(username=username, email=f'{username}@example.com')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(next_free_username('johnsmith'), 'johnsmith13')
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIKE', queries[0]['sql'])
+        self.assertNotIn('REGEXP', queries[0]['sql'].upper())
+        self.assertEqual(next_free_username('janedoe'), 'janedoe')
+
+    def test_duplicate_email_is_rejected_case_insensitively(self):
+        self.register('john@example.com')
+        response = self.register('John@Example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['field'], 'email')
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_username_taken_concurrently_is_retried(self):
+        User.objects.create(username='johnsmith', email='first@example.com')
+        # Simulate a registration racing us to johnsmith1 after our suffix lookup
+        with mock.patch('accounts.serializers.next_free_username', side_effect=['johnsmith', 'johnsmith1']):
+            response = self.register('john@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['username'], 'johnsmith1')
+
+
+# Every provisioned rider has a password; a fast hasher keeps hundreds of them cheap here
+@override_settings(PROVISION_HASH_WORKERS=0, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RiderProvisioningTests(TestCase):
+    def test_creates_every_related_row_and_reports_bad_rows(self):
+        create_rider('taken@example.com')
+        rows = [
+            {'email': 'Ann@Fleet.com', 'first_name': 'Ann', 'last_name': 'Lee', 'password': 'fleetpass1', 'location': 'Pune'},
+            {'email': 'bob@fleet.com', 'first_name': 'Ann', 'last_name': 'Lee', 'password': 'fleetpass2'},
+            {'email': 'ann@fleet.com', 'first_name': 'Dup', 'last_name': 'Row', 'password': 'fleetpass3'},
+            {'email': 'taken@example.com', 'first_name': 'Old', 'last_name': 'User', 'password': 'fleetpass4'},
+            {'email': 'not-an-email', 'first_name': 'Bad', 'last_name': 'Row', 'password': 'fleetpass5'},
+            {'email': 'nopass@fleet.com', 'first_name': 'No', 'last_name': 'Password'},
+        ]
+        created, results = provision_riders(rows, workers=0, chunk_size=2)
+
+        self.assertEqual(created, 2)
+        self.assertEqual([r['status'] for r in results], ['created', 'created', 'error', 'error', 'error', 'error'])
+        self.assertEqual([r['username'] for r in results[:2]], ['annlee', 'annlee1'])
+        self.assertIn('password', results[5]['errors'])
+
+        ann = User.objects.get(email='ann@fleet.com')
+        self.assertTrue(ann.check_password('fleetpass1'))
+        self.assertEqual(ann.profile.rider_id, results[0]['rider_id'])
+        self.assertEqual(ann.profile.location, 'Pune')
+        self.assertEqual(ann.rider_info.rider_id, results[0]['rider_id'])
+        self.assertTrue(RiderBalance.objects.filter(user=ann).exists())
+        self.assertTrue(User.objects.get(email='bob@fleet.com').check_password('fleetpass2'))
+
+    def test_query_count_does_not_grow_per_rider(self):
+        rows = [
+            {'email': f'rider{n}@fleet.com', 'first_name': 'Fleet', 'last_name': 'Rider', 'password': 'fleetpass1'}
+            for n in range(200)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            created, _ = provision_riders(rows, workers=0)
+        self.assertEqual(created, 200)
+        self.assertLess(len(queries), 25)
+
+    def test_usernames_are_allocated_without_a_query_per_name(self):
+        for username in ('annlee', 'annlee007', 'bobday'):
+            User.objects.create(username=username, email=f'{username}@example.com')
+        rows = [
+            {'email': f'rider{n}@fleet.com', 'first_name': f'Name{n}', 'last_name': 'Rider', 'password': 'fleetpass1'}
+            for n in range(300)
+        ] + [
+            {'email': 'ann@fleet.com', 'first_name': 'Ann', 'last_name': 'Lee', 'password': 'fleetpass1'},
+            {'email': 'bob@fleet.com', 'first_name': 'Bob', 'last_name': 'Day', 'password': 'fleetpass1'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            created, results = provision_riders(rows, workers=0)
+        self.assertEqual(created, 302)
+        self.assertEqual([r['username'] for r in results[-2:]], ['annlee8', 'bobday1'])
+        self.assertEqual(len([query for query in queries if 'LIKE' in query['sql']]), 2)
+
+    def test_api_is_staff_only_and_accepts_csv(self):
+        upload = BytesIO(b'email,first_name,last_name,password\ncsv@fleet.com,Csv,Rider,fleetpass1\n')
+        upload.name = 'riders.csv'
+        self.assertEqual(self.client.post('/api/riders/provision/', {'file': upload}).status_code, 403)
+
+        User.objects.create_user('admin', 'admin@example.com', 'adminpass1', is_staff=True)
+        self.client.login(username='admin', password='adminpass1')
+        upload.seek(0)
+        with override_settings(PROVISION_HASH_WORKERS=None), \
+                mock.patch('accounts.views.provision_pool.map', side_effect=lambda func, items, chunksize: [
+                    func(item) for item in items]) as pool_map:
+            response = self.client.post('/api/riders/provision/', {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['results'][0]['username'], 'csvrider')
+        # Hashed in the long-lived pool, not one started for the request
+        pool_map.assert_called_once()
+
+    def test_read_riders_accepts_both_json_shapes(self):
+        body = [{'email': 'a@fleet.com', 'first_name': 'A', 'last_name': 'B'}]
+        self.assertEqual(read_riders(BytesIO(json.dumps(body).encode()), 'json'), body)
+        self.assertEqual(read_riders(BytesIO(json.dumps({'riders': body}).encode()), 'json'), body)
+
+
+class EmailDirectoryTests(TestCase):
+    def test_login_and_rider_lookups_ignore_case(self):
+        self.client.post('/api/register/', {
+            'email': 'Mixed.Case@Example.com', 'password': 'testpass123', 'confirm_password': 'testpass123',
+            'first_name': 'Mixed', 'last_name': 'Case',
+        }, content_type='application/json')
+        user = User.objects.get()
+        self.assertEqual(user.email, 'mixed.case@example.com')
+
+        response = self.client.post('/api/login/', {'email': 'MIXED.case@example.COM', 'password': 'testpass123'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/riders/by-email/', {'email': 'Mixed.Case@example.com'})
+        self.assertEqual(response.json()['user_id'], user.pk)
+
+        response = self.client.post('/api/riders/verify/', {
+            'rider_id': user.profile.rider_id, 'email': 'MIXED.CASE@EXAMPLE.COM',
+        }, content_type='application/json')
+        self.assertTrue(response.json()['verified'])
+
+    def test_lookups_use_the_lower_expression(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/api/login/', {'email': 'nobody@example.com', 'password': 'x'}, content_type='application/json')
+        self.assertIn('LOWER(', queries[0]['sql'].upper())
+        self.assertNotIn(' LIKE ', queries[0]['sql'].upper())
+
+    def test_no_lookup_is_registered_on_every_charfield(self):
+        import accounts.email_directory  # noqa: F401
+        from django.db.models import CharField
+        self.assertIsNone(CharField().get_transform('lower'))
+
+    def test_change_email_rejects_an_address_in_another_case(self):
+        create_rider('first@example.com')
+        _, rider_id = create_rider('second@example.com')
+        response = self.client.post('/api/profile/change-email/', {
+            'rider_id': rider_id, 'new_email': 'FIRST@example.com', 'current_password': 'testpass123',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('new_email', response.json())
+
+
+class RiderDirectoryTests(TestCase):
+    def setUp(self):
+        self.rider_ids = [create_rider(f'rider{n}@example.com')[1] for n in range(7)]
+        RiderInfo.objects.filter(rider_id=self.rider_ids[0]).update(is_active=False)
+        Profile.objects.filter(rider_id=self.rider_ids[1]).update(location='Pune')
+
+    def test_pages_cover_every_rider_with_constant_queries(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            with CaptureQueriesContext(connection) as queries:
+                body = self.client.get('/api/riders/all/', params).json()
+            # One query for the page, plus one for the counts on the first page
+            self.assertEqual(len(queries), 1 if cursor else 2)
+            seen.extend(rider['rider_id'] for rider in body['riders'])
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(self.rider_ids))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_counts_and_fields(self):
+        body = self.client.get('/api/riders/all/').json()
+        self.assertEqual((body['total_riders'], body['active_riders']), (7, 6))
+        rider = next(r for r in body['riders'] if r['rider_id'] == self.rider_ids[1])
+        self.assertEqual(rider['location'], 'Pune')
+        self.assertEqual(rider['first_name'], 'Test')
+        self.assertFalse(body['has_more'])
+
+    def test_stream_dumps_everything(self):
+        response = self.client.get('/api/riders/all/', {'stream': '1'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(sorted(json.loads(line)['rider_id'] for line in lines), sorted(self.rider_ids))
+
+    def test_rejects_bad_cursor_and_limit(self):
+        self.assertEqual(self.client.get('/api/riders/all/', {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/riders/all/', {'limit': '0'}).status_code, 400)
+
+
+class ValuesListSerializerTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('5000'), date=date(2025, 1, 1))
+        Income.objects.create(user=self.user, source='Tips', amount=Decimal('12.5'), date=date(2025, 1, 2), notes='Late shift')
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('250.75'), date=date(2025, 1, 2))
+        MutualFund.objects.create(user=self.user, name='Index Fund', fund_type='Equity',
+                                  invested_amount=Decimal('1000'), current_value=Decimal('1100.5'))
+        MutualFund.objects.create(user=self.user, name='Debt Fund', fund_type='Debt',
+                                  invested_amount=Decimal('500.25'), current_value=Decimal('510'))
+
+    def assertSameJSON(self, fast, serializer_class, queryset):
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(fast.data(queryset)),
+            renderer.render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_output_is_byte_identical_to_model_serializers(self):
+        self.assertSameJSON(fast_income_list, IncomeSerializer, Income.objects.order_by('id'))
+        self.assertSameJSON(fast_expense_list, ExpenseSerializer, Expense.objects.order_by('id'))
+        self.assertSameJSON(fast_mutual_fund_list, MutualFundSerializer, MutualFund.objects.order_by('id'))
+
+    def test_funds_list_reads_values_not_instances(self):
+        with mock.patch.object(MutualFund, 'from_db', side_effect=AssertionError('model instance built')):
+            response = self.client.get('/api/funds/', {'rider_id': self.rider_id})
+        self.assertEqual([fund['name'] for fund in response.json()], ['Debt Fund', 'Index Fund'])
+        self.assertEqual(response.json()[0]['invested_amount'], '500.25')
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('5000'), date=date(2025, 1, 1))
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('250.75'), date=date(2025, 1, 2))
+        MutualFund.objects.create(user=self.user, name='Index Fund', fund_type='Equity',
+                                  invested_amount=Decimal('1000'), current_value=Decimal('1100.5'))
+
+    def test_funds_list_selects_only_requested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/funds/', {'rider_id': self.rider_id, 'fields': 'name,current_value'})
+        self.assertEqual(response.json(), [{'name': 'Index Fund', 'current_value': '1100.50'}])
+        sql = queries[-1]['sql']
+        self.assertIn('current_value', sql)
+        self.assertNotIn('invested_amount', sql)
+
+    def test_recent_transactions_still_sorted_without_date(self):
+        response = self.client.get('/api/transactions/recent/', {'rider_id': self.rider_id, 'fields': 'amount,category'})
+        self.assertEqual(response.json()['transactions'], [
+            {'amount': '250.75', 'category': 'Food'},
+            {'amount': '5000.00'},
+        ])
+
+    async def test_rows_with_none_of_the_fields_are_left_out(self):
+        for client in (sync_to_async(self.client.get), self.async_client.get):
+            response = await client('/api/transactions/recent/', {'rider_id': self.rider_id, 'fields': 'source'})
+            self.assertEqual(response.json()['transactions'], [{'source': 'Salary'}])
+
+    def test_rider_directory_skips_unrequested_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            body = self.client.get('/api/riders/all/', {'fields': 'email', 'limit': 1}).json()
+        self.assertEqual(body['riders'], [{'email': 'rider@example.com'}])
+        self.assertNotIn('accounts_profile', queries[0]['sql'])
+        self.assertNotIn('auth_user', queries[0]['sql'])
+
+    def test_user_info_and_unknown_fields(self):
+        response = self.client.get('/api/user-info/', {'rider_id': self.rider_id, 'fields': 'user_id,email'})
+        self.assertEqual(response.json(), {'user_id': self.user.pk, 'email': 'rider@example.com'})
+        response = self.client.get('/api/funds/', {'rider_id': self.rider_id, 'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['error'])
+
+
+class RiderDataETagTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        MutualFund.objects.create(user=self.user, name='Index Fund', fund_type='Equity',
+                                  invested_amount=Decimal('1000'), current_value=Decimal('1100.5'))
+
+    def get(self, url, etag=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, {'rider_id': self.rider_id, **params}, **headers)
+
+    def test_unchanged_data_answers_304_without_running_the_view(self):
+        for url in ('/api/dashboard/', '/api/transactions/recent/', '/api/funds/', '/api/portfolio/summary/'):
+            etag = self.get(url)['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get(url, etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response['ETag'], etag)
+            # Only the data_version read; the resolver is warm
+            self.assertEqual(len(queries), 1, [query['sql'] for query in queries])
+            self.assertIn('data_version', queries[0]['sql'])
+
+    def test_every_tracked_write_changes_the_etag(self):
+        writes = [
+            lambda: Income.objects.create(user=self.user, source='Salary', amount=Decimal('10'), date=date(2025, 1, 1)),
+            lambda: Expense.objects.create(user=self.user, category='Food', amount=Decimal('5'), date=date(2025, 1, 1)),
+            lambda: MutualFund.objects.filter(user=self.user).first().delete(),
+            lambda: Profile.objects.filter(user=self.user).first().save(),
+        ]
+        etag = self.get('/api/dashboard/')['ETag']
+        for write in writes:
+            write()
+            response = self.get('/api/dashboard/', etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_etag_depends_on_representation(self):
+        full = self.get('/api/funds/')['ETag']
+        sparse = self.get('/api/funds/', fields='name')['ETag']
+        self.assertNotEqual(full, sparse)
+        self.assertEqual(self.get('/api/funds/', full, fields='name').status_code, 200)
+        self.assertIn('private', self.get('/api/funds/')['Cache-Control'])
+
+    def test_unknown_rider_has_no_etag(self):
+        response = self.client.get('/api/dashboard/', {'rider_id': '00000000'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class BootstrapTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('5000'), date=date(2025, 1, 1))
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('250.75'), date=date(2025, 1, 2))
+        MutualFund.objects.create(user=self.user, name='Index Fund', fund_type='Equity',
+                                  invested_amount=Decimal('1000'), current_value=Decimal('1100.5'))
+        MutualFund.objects.create(user=self.user, name='Debt Fund', fund_type='Debt',
+                                  invested_amount=Decimal('500.25'), current_value=Decimal('480'))
+
+    def test_parts_match_the_individual_endpoints(self):
+        body = self.client.get('/api/bootstrap/', {'rider_id': self.rider_id}).json()
+        params = {'rider_id': self.rider_id}
+        self.assertEqual(body['dashboard'], self.client.get('/api/dashboard/', params).json())
+        self.assertEqual(body['recent'], self.client.get('/api/transactions/recent/', params).json())
+        self.assertEqual(body['funds'], self.client.get('/api/funds/', params).json())
+        self.assertEqual(body['summary'], self.client.get('/api/portfolio/summary/', params).json())
+        self.assertEqual(body['profile'], self.client.get('/api/profile/', params).json())
+        self.assertNotIn('market', body)
+
+    def test_summary_without_funds_uses_the_aggregate(self):
+        body = self.client.get('/api/bootstrap/', {'rider_id': self.rider_id, 'views': 'summary'}).json()
+        self.assertEqual(body['summary'], self.client.get('/api/portfolio/summary/', {'rider_id': self.rider_id}).json())
+        self.assertEqual(set(body), {'rider_id', 'summary'})
+
+    def test_one_query_per_part(self):
+        self.client.get('/api/bootstrap/', {'rider_id': self.rider_id})  # warm the rider cache
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/bootstrap/', {'rider_id': self.rider_id, 'views': 'dashboard,recent,funds,summary'})
+        # data_version, balance, incomes, expenses, funds (the summary reuses the fund rows)
+        self.assertEqual(len(queries), 5)
+
+    def test_market_is_opt_in_and_never_304(self):
+        with mock.patch('accounts.views.market_data_cache.get', return_value={'marketStatus': 'Open'}):
+            response = self.client.get('/api/bootstrap/', {'rider_id': self.rider_id, 'views': 'funds,market'})
+        self.assertEqual(response.json()['market'], {'marketStatus': 'Open'})
+        self.assertFalse(response.has_header('ETag'))
+
+        etag = self.client.get('/api/bootstrap/', {'rider_id': self.rider_id})['ETag']
+        response = self.client.get('/api/bootstrap/', {'rider_id': self.rider_id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_rejects_unknown_views(self):
+        response = self.client.get('/api/bootstrap/', {'rider_id': self.rider_id, 'views': 'funds,secrets'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secrets', response.json()['error'])
+
+
+class RiderTokenTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('5000'), date=date(2025, 1, 1))
+
+    def auth(self, token):
+        return {'HTTP_AUTHORIZATION': f'Rider {token}'}
+
+    def test_login_token_replaces_rider_id(self):
+        response = self.client.post('/api/login/', {'email': 'rider@example.com', 'password': 'testpass123'},
+                                    content_type='application/json')
+        token = response.json()['token']
+        self.assertEqual(verify_rider_token(token).rider_id, self.rider_id)
+
+        cache.clear()
+        rider_resolver.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/dashboard/', **self.auth(token))
+        self.assertEqual(response.json()['total_income'], 5000.0)
+        # No rider lookup: only the version and balance reads
+        self.assertFalse([query for query in queries if 'accounts_profile' in query['sql']])
+
+        response = self.client.post('/api/income/add/', {
+            'source': 'Tips', 'amount': '10.00', 'date': '2025-01-02',
+        }, content_type='application/json', **self.auth(token))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 2)
+
+    def test_rejects_forged_and_expired_tokens(self):
+        token = issue_rider_token(self.user.pk, self.rider_id)
+        payload, _, signature = token.rpartition('.')
+        user_id, rider_id, expires_at = payload.split('.')
+        forged = f'{user_id}.00000000.{expires_at}.{signature}'
+        expired = issue_rider_token(self.user.pk, self.rider_id, ttl=-1)
+        for bad in (forged, expired, 'garbage'):
+            with self.assertRaises(ValueError):
+                verify_rider_token(bad)
+            response = self.client.get('/api/dashboard/', {'rider_id': self.rider_id}, **self.auth(bad))
+            self.assertEqual(response.status_code, 401)
+
+    def test_token_of_a_deleted_account_writes_nothing(self):
+        token = issue_rider_token(self.user.pk, self.rider_id)
+        response = self.client.post('/api/profile/delete-account/', {'current_password': 'testpass123'},
+                                    content_type='application/json', **self.auth(token))
+        self.assertEqual(response.status_code, 200)
+
+        writes = [
+            ('/api/income/add/', {'source': 'Tips', 'amount': '10.00', 'date': '2025-01-02'}),
+            ('/api/expense/add/', {'category': 'Food', 'amount': '5.00', 'date': '2025-01-02'}),
+            ('/api/transactions/batch/', {'transactions': [
+                {'type': 'income', 'source': 'Tips', 'amount': 10, 'date': '2025-01-02'},
+            ]}),
+            ('/api/funds/add/', {'name': 'Index Fund', 'fund_type': 'Equity',
+                                 'invested_amount': '1000', 'current_value': '1100'}),
+        ]
+        for url, body in writes:
+            response = self.client.post(url, body, content_type='application/json', **self.auth(token))
+            self.assertEqual(response.status_code, 404, url)
+        reads = ['/api/dashboard/', '/api/bootstrap/', '/api/transactions/recent/', '/api/funds/',
+                 '/api/portfolio/summary/', '/api/transactions/', '/api/analytics/', '/api/transactions/export/']
+        for url in reads:
+            self.assertEqual(self.client.get(url, **self.auth(token)).status_code, 404, url)
+        self.assertFalse(Income.objects.exists())
+        self.assertFalse(MutualFund.objects.exists())
+        self.assertFalse(RiderBalance.objects.exists())
+
+    async def test_async_dashboard_of_a_deleted_account_is_not_found(self):
+        token = await sync_to_async(issue_rider_token)(self.user.pk, self.rider_id)
+        await self.user.adelete()
+        for url in ('/api/dashboard/', '/api/transactions/recent/', '/api/funds/', '/api/portfolio/summary/'):
+            response = await self.async_client.get(url, headers={'authorization': f'Rider {token}'})
+            self.assertEqual(response.status_code, 404, url)
+        self.assertFalse(await RiderBalance.objects.aexists())
+
+    def test_export_takes_the_rider_from_the_token(self):
+        token = issue_rider_token(self.user.pk, self.rider_id)
+        response = self.client.get('/api/transactions/export/', {'format': 'ndjson'}, **self.auth(token))
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['source'] for row in rows], ['Salary'])
+
+        response = self.client.get('/api/transactions/export/', **self.auth(token + 'x'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Rider')
+
+    def test_profile_patch_takes_the_rider_from_the_token(self):
+        token = issue_rider_token(self.user.pk, self.rider_id)
+        response = self.client.patch('/api/profile/', {'first_name': 'Tokened'},
+                                     content_type='application/json', **self.auth(token))
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Tokened')
+
+    @override_settings(RIDER_TOKEN_KEY='rotated')
+    def test_rotating_the_key_invalidates_tokens(self):
+        with override_settings(RIDER_TOKEN_KEY='original'):
+            token = issue_rider_token(self.user.pk, self.rider_id)
+        with self.assertRaises(ValueError):
+            verify_rider_token(token)
+
+
+class LeanAPIMiddlewareTests(TestCase):
+    def test_api_requests_skip_the_page_middleware(self):
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Frame-Options'))
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+
+    def test_pages_keep_the_full_stack(self):
+        response = self.client.get('/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+        self.assertTrue(hasattr(response.wsgi_request, 'user'))
+
+    def test_session_authenticated_api_keeps_sessions_and_csrf(self):
+        User.objects.create_user('admin', 'admin@example.com', 'adminpass1', is_staff=True)
+        client = self.client_class(enforce_csrf_checks=True)
+        client.login(username='admin', password='adminpass1')
+        response = client.post('/api/riders/provision/', {'riders': []}, content_type='application/json')
+        # Logged in through the session, then refused by DRF's own CSRF check
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+
+    def test_api_posts_need_no_csrf_token(self):
+        create_rider()
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.post('/api/login/', {'email': 'rider@example.com', 'password': 'testpass123'},
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncViewTests(TestCase):
+    # self.async_client goes through the ASGI handler, so ASGI_URLCONF routes to accounts/async_views.py
+    URLS = ['/api/dashboard/', '/api/transactions/recent/', '/api/funds/', '/api/portfolio/summary/']
+
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+        Income.objects.create(user=self.user, source='Salary', amount=Decimal('5000'), date=date(2025, 1, 1))
+        Expense.objects.create(user=self.user, category='Food', amount=Decimal('250.75'), date=date(2025, 1, 2),
+                               notes='Lunch')
+        MutualFund.objects.create(user=self.user, name='Index Fund', fund_type='Equity',
+                                  invested_amount=Decimal('1000'), current_value=Decimal('1100.5'))
+
+    async def test_responses_match_the_sync_views(self):
+        accepts = ['application/json'] + (['application/msgpack'] if msgpack is not None else [])
+        cases = [(url, {}) for url in self.URLS] + [
+            ('/api/transactions/recent/', {'fields': 'id,amount'}), ('/api/funds/', {'fields': 'name'}),
+        ]
+        for url, params in cases:
+            for accept in accepts:
+                query = {'rider_id': self.rider_id, **params}
+                expected = await sync_to_async(self.client.get)(url, query, headers={'accept': accept})
+                response = await self.async_client.get(url, query, headers={'accept': accept})
+                self.assertEqual(response.status_code, 200, (url, accept, params))
+                self.assertEqual(response.content, expected.content, (url, accept, params))
+                for header in ('Content-Type', 'ETag', 'Cache-Control'):
+                    self.assertEqual(response[header], expected[header], (url, header))
+
+    async def test_unchanged_data_answers_304(self):
+        for url in self.URLS:
+            etag = (await self.async_client.get(url, {'rider_id': self.rider_id}))['ETag']
+            response = await self.async_client.get(url, {'rider_id': self.rider_id}, headers={'if-none-match': etag})
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.content, b'')
+
+    async def test_rider_token_and_errors(self):
+        token = await sync_to_async(issue_rider_token)(self.user.pk, self.rider_id)
+        expected = await self.async_client.get('/api/dashboard/', {'rider_id': self.rider_id})
+        response = await self.async_client.get('/api/dashboard/', headers={'authorization': f'Rider {token}'})
+        self.assertEqual(response.content, expected.content)
+
+        response = await self.async_client.get('/api/dashboard/', headers={'authorization': f'Rider {token}x'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Rider')
+        for header in (f'Rider {token}x', f'Rider {token} extra', 'Rider'):
+            expected = await sync_to_async(self.client.get)('/api/dashboard/', HTTP_AUTHORIZATION=header)
+            response = await self.async_client.get('/api/dashboard/', headers={'authorization': header})
+            self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+        expected = await sync_to_async(self.client.get)('/api/market-data/', HTTP_ACCEPT='text/csv')
+        response = await self.async_client.get('/api/market-data/', headers={'accept': 'text/csv'})
+        self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+        self.assertEqual((await self.async_client.get('/api/dashboard/')).status_code, 400)
+        response = await self.async_client.get('/api/funds/', {'rider_id': '00000000'})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+        response = await self.async_client.get('/api/funds/', {'rider_id': self.rider_id, 'fields': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_market_data_awaits_the_cache(self):
+        payload = {'marketStatus': 'Open', 'nifty50': None, 'nifty100': None, 'bankNifty': None}
+        with mock.patch('accounts.async_views.market_data_cache.aget', new=mock.AsyncMock(return_value=payload)) as aget:
+            response = await self.async_client.get('/api/market-data/')
+        self.assertEqual(response.json(), payload)
+        aget.assert_awaited_once()
+
+    async def test_asgi_urlconf_can_be_switched_off(self):
+        # The middleware chain is built on the client's first request, so under these settings
+        with self.settings(ASGI_URLCONF=None), \
+                mock.patch('accounts.async_views.market_data_cache.aget') as aget, \
+                mock.patch('accounts.views.market_data_cache.get', return_value={'marketStatus': 'Open'}):
+            response = await self.async_client.get('/api/market-data/')
+        self.assertEqual(response.json(), {'marketStatus': 'Open'})
+        aget.assert_not_called()
+
+
+class PasswordHashPoolTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+
+    def pool(self, **kwargs):
+        pool = PasswordHashPool(**kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_pooled_hasher_writes_djangos_hashes(self):
+        pool = self.pool(workers=1)
+        with mock.patch('accounts.password_pool.password_pool', pool):
+            encoded = PooledPBKDF2PasswordHasher().encode('secret123', 'saltsalt', 1000)
+        self.assertEqual(encoded, PBKDF2PasswordHasher().encode('secret123', 'saltsalt', 1000))
+        self.assertEqual(pool.stats()['completed'], 1)
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_workers_are_not_forked_from_the_web_worker(self):
+        pool = self.pool(workers=1)
+        self.assertEqual(pool.map(abs, [-1]), [1])
+        self.assertIn(pool._executor._mp_context.get_start_method(), ('forkserver', 'spawn'))
+
+    def test_batches_run_in_the_same_processes(self):
+        pool = self.pool(workers=1)
+        self.assertEqual(pool.map(abs, [-1, 2, -3], chunksize=2), [1, 2, 3])
+        executor = pool._executor
+        self.assertEqual(pool.map(abs, [-4]), [4])
+        self.assertIs(pool._executor, executor)
+
+    def test_full_queue_is_rejected_not_queued(self):
+        pool = self.pool(workers=1, max_queue=0, retry_after=3)
+        busy = threading.Thread(target=pool.run, args=(time.sleep, 0.5))
+        busy.start()
+        deadline = time.monotonic() + 10
+        while pool.stats()['in_flight'] < 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        with self.assertRaises(PasswordPoolBusy) as raised:
+            pool.run(time.sleep, 0)
+        self.assertEqual(raised.exception.wait, 3)
+        busy.join()
+        stats = pool.stats()
+        self.assertEqual((stats['submitted'], stats['rejected'], stats['completed'], stats['in_flight']), (1, 1, 1, 0))
+        self.assertGreaterEqual(stats['hash_ms_max'], 450)
+
+    def test_password_endpoints_answer_503_with_retry_after(self):
+        requests = [
+            ('/api/login/', {'email': 'rider@example.com', 'password': 'testpass123'}),
+            ('/api/profile/change-password/', {'rider_id': self.rider_id, 'old_password': 'testpass123',
+                                               'new_password': 'newpass456', 'confirm_new_password': 'newpass456'}),
+            ('/api/profile/delete-account/', {'rider_id': self.rider_id, 'current_password': 'testpass123'}),
+            ('/api/register/', {'email': 'new@example.com', 'first_name': 'New', 'last_name': 'Rider',
+                                'password': 'testpass123', 'confirm_password': 'testpass123'}),
+        ]
+        with mock.patch('accounts.password_pool.password_pool.run', side_effect=PasswordPoolBusy(5)):
+            for url, body in requests:
+                response = self.client.post(url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 503, url)
+                self.assertEqual(response['Retry-After'], '5')
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_metrics_report_the_pool(self):
+        stats = self.client.get('/api/metrics/').json()['password_pool']
+        self.assertEqual(stats['workers'], 2)
+        self.assertIn('queue_depth', stats)
+        self.assertIn('hash_ms_p95', stats)
+
+
+class FastJSONConformanceTests(SimpleTestCase):
+    """FastJSONRenderer/FastJSONParser must agree with DRF's stdlib JSON classes byte for byte."""
+
+    def corpus(self):
+        utc = datetime.timezone.utc
+        return [
+            {'total_income': Decimal('5000.00'), 'total_expense': Decimal('0'), 'balance': Decimal('-12.50')},
+            {'date': date(2025, 1, 31), 'created_at': datetime.datetime(2025, 1, 31, 8, 30, 5, 123456, tzinfo=utc)},
+            {'naive': datetime.datetime(2025, 1, 31, 8, 30), 'time': datetime.time(8, 30, 1),
+             'delta': datetime.timedelta(hours=1, seconds=1)},
+            {'id': uuid.UUID('12345678-1234-5678-1234-567812345678'), 'lazy': gettext_lazy('Invalid rider_id')},
+            ReturnDict({'name': 'Index Fund', 'notes': None, 'ok': True}, serializer=None),
+            ReturnList([{'a': 1}, {'b': [1, 2.5, -3]}], serializer=None),
+            {'errors': {'email': [ErrorDetail('Enter a valid email address.', code='invalid')]}},
+            {'unicode': 'नमस्ते ₹ \u2028 \u2029 "quoted" \\ \n\t', 'empty': '', 'list': [], 'dict': {}},
+            {1: 'int key', 'nested': {'tuple': (1, 2), 'big': 2 ** 70, 'neg': -2 ** 63}},
+            [0.1, 1.5, 100.0, -0.0, 123456.789],
+            'plain string', 42, None,
+        ]
+
+    def test_renderer_output_matches_json_renderer(self):
+        for data in self.corpus():
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_renderer_falls_back_for_indent_and_without_orjson(self):
+        data = {'amount': Decimal('1.00'), 'day': date(2025, 1, 1)}
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
+        with mock.patch('accounts.renderers.orjson', None):
+            for data in self.corpus():
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_parser_matches_json_parser(self):
+        bodies = [
+            b'{"rider_id": "12345678", "amount": 250.75, "tags": ["a", "b"], "ok": true, "none": null}',
+            '{"name": "नमस्ते", "escaped": "\\u00e9\\ud83d\\ude00"}'.encode(),
+            b'{"big": 123456789012345678901234567890, "a": 1, "a": 2}',
+            b'[1e400, -0.0, 0.1]',
+            b' \n {"padded": 1} \n',
+            b'"\\ud800"',
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+
+    def test_parser_errors_match_json_parser(self):
+        for body in [b'', b'{"a": ', b'NaN', b'{"a": Infinity}', b'\xff']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    JSONParser().parse(BytesIO(body))
+                try:
+                    result = FastJSONParser().parse(BytesIO(body))
+                except ParseError as e:
+                    self.assertEqual(str(e), str(expected.exception))
+                else:
+                    self.fail(f'{body!r} parsed as {result!r}')
+
+    def test_api_views_use_the_fast_classes_by_default(self):
+        self.assertIsInstance(APIView().get_renderers()[0], FastJSONRenderer)
+        self.assertIsInstance(APIView().get_parsers()[0], FastJSONParser)
+
+
+class MessagePackTests(TestCase):
+    def setUp(self):
+        self.user, self.rider_id = create_rider()
+
+    @skipUnless(msgpack is not None, 'msgpack is not installed')
+    def test_responses_keep_decimals_and_timestamps(self):
+        MutualFund.objects.create(user=self.user, name='Index Fund', fund_type='Equity',
+                                  invested_amount=Decimal('1000.5'), current_value=Decimal('1100'))
+        response = self.client.get('/api/funds/', {'rider_id': self.rider_id}, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        fund, = MessagePackParser().parse(BytesIO(response.content))
+        self.assertEqual(fund['invested_amount'], Decimal('1000.50'))
+        self.assertEqual(str(fund['current_value']), '1100.00')
+        self.assertIsInstance(fund['created_at'], datetime.datetime)
+
+        json_fund, = self.client.get('/api/funds/', {'rider_id': self.rider_id}).json()
+        self.assertEqual(json_fund['invested_amount'], '1000.50')
+
+    @skipUnless(msgpack is not None, 'msgpack is not installed')
+    def test_add_income_accepts_msgpack(self):
+        body = MessagePackRenderer().render({
+            'rider_id': self.rider_id, 'source': 'Salary', 'amount': Decimal('5000.25'), 'date': '2025-01-01',
+        })
+        response = self.client.post('/api/income/add/', body, content_type='application/msgpack')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Income.objects.get(user=self.user).amount, Decimal('5000.25'))
+
+    def test_decimal_extension_round_trips(self):
+        for value in ['0', '0.00', '5000.25', '-12.50', '99999999.99', '1E+3', '-0.001']:
+            self.assertEqual(str(decode_decimal(encode_decimal(Decimal(value)))), str(Decimal(value)))
+
+    def test_not_offered_without_msgpack(self):
+        with mock.patch.object(MessagePackRenderer, 'available', False):
+            response = self.client.get('/api/dashboard/', {'rider_id': self.rider_id}, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 406)
@@ -1,11 +1,11 @@
 from django.urls import path
 from .views import (
     RegisterView, LoginView,ProfileView,ChangeEmailView,ChangePasswordView,DeleteAccountView,
-    add_income, add_expense,
-    dashboard_data, recent_transactions, get_user_info, get_all_riders, get_rider_by_email, verify_rider_email,
+    add_income, add_expense, add_transactions_batch, provision_riders_api,
+    dashboard_data, recent_transactions, transaction_history, export_transactions, analytics_api, get_user_info, get_all_riders, get_rider_by_email, verify_rider_email,
     get_personal_info, update_personal_info,
     login_page, register_page, dashboard_selection_page, daily_expense_dashboard_page,phonepay_gold_dashboard,mutualfund_dashboard,add_fund_api,funds_list_api,delete_fund_api,portfolio_summary_api,
-    market_data_api,update_fund_api,profile_page,
+    market_data_api,market_data_stream,update_fund_api,profile_page,metrics_api,bootstrap_api,
 )
 
 urlpatterns = [
@@ -16,22 +16,30 @@ urlpatterns = [
     path('api/riders/all/', get_all_riders, name='api-all-riders'),
     path('api/riders/by-email/', get_rider_by_email, name='api-rider-by-email'),
     path('api/riders/verify/', verify_rider_email, name='api-verify-rider-email'),
+    path('api/riders/provision/', provision_riders_api, name='api-provision-riders'),
     path('api/personal-info/', get_personal_info, name='api-get-personal-info'),
     path('api/personal-info/update/', update_personal_info, name='api-update-personal-info'),
     path('api/profile/', ProfileView.as_view(), name='api-profile'),
     path('api/income/add/', add_income, name='api-add-income'),
     path('api/expense/add/', add_expense, name='api-add-expense'),
+    path('api/transactions/batch/', add_transactions_batch, name='api-transactions-batch'),
     path('api/dashboard/', dashboard_data, name='api-dashboard'),
+    path('api/bootstrap/', bootstrap_api, name='api-bootstrap'),
+    path('api/transactions/', transaction_history, name='api-transactions'),
     path('api/transactions/recent/', recent_transactions, name='api-recent-transactions'),
+    path('api/transactions/export/', export_transactions, name='api-transactions-export'),
+    path('api/analytics/', analytics_api, name='api-analytics'),
      path('api/funds/add/', add_fund_api, name='api-add-fund'),
     path('api/funds/', funds_list_api, name='api-funds-list'),
     path('api/funds/update/<int:fund_id>/', update_fund_api, name='api-update-fund'),
     path('api/funds/delete/', delete_fund_api, name='api-delete-fund'),
      path('api/portfolio/summary/', portfolio_summary_api, name='api-portfolio-summary'),
      path('api/market-data/', market_data_api, name='api-market-data'),
+     path('api/market-data/stream/', market_data_stream, name='api-market-data-stream'),
      path('api/profile/change-email/', ChangeEmailView.as_view(), name='api-change-email'),
      path('api/profile/change-password/', ChangePasswordView.as_view(), name='api-change-password'),
      path('api/profile/delete-account/', DeleteAccountView.as_view(), name='api-delete-account'),
+    path('api/metrics/', metrics_api, name='api-metrics'),
 
     # UI routes
     path('', login_page, name='login-page'),
@@ -2,44 +2,142 @@ from django.contrib.auth import authenticate
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse
-from django.db.models import Sum, DecimalField
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from django.utils.cache import patch_cache_control
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum, DecimalField, CharField, F, Q, Value
 from django.contrib.auth.models import User
+from django.utils.dateparse import parse_datetime
 from django.db.models.functions import Coalesce
 from rest_framework import views, status
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder as DRFJSONEncoder
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, parser_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
 
-import requests
+import csv
+import hashlib
+import heapq
+import json
+from functools import wraps
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
 
 
-from .models import Income, Expense, MutualFund, Profile, RiderInfo
-from .serializers import UserSerializer, IncomeSerializer, ExpenseSerializer,MutualFundSerializer,UserProfileSerializer,ChangeEmailSerializer,ChangePasswordSerializer
+from .models import Income, Expense, MutualFund, RiderInfo, RiderBalance, DailySummary, record_bulk_entries
+from .serializers import UserSerializer, IncomeSerializer, ExpenseSerializer,MutualFundSerializer,UserProfileSerializer,ChangeEmailSerializer,ChangePasswordSerializer,TransactionSerializer
+from .serializers import fast_income_list, fast_expense_list, fast_mutual_fund_list
+from .email_directory import riders_with_email, users_with_email
+from .pagination import encode_cursor, decode_cursor
+from .provisioning import provision_pool, provision_riders, read_riders
+from .renderers import FastJSONParser, wants_native_types
+from .password_pool import PasswordPoolBusy, password_pool
+from .rider_cache import rider_resolver
+from .rider_tokens import RiderToken, RiderTokenAuthentication, authenticate_rider_request, issue_rider_token
+from .market_data import market_data_cache
+from .market_stream import market_broadcaster, market_event_stream
 
 # Helper function to get user by rider_id
 def get_user_by_rider_id(rider_id):
-    try:
-        profile = Profile.objects.get(rider_id=rider_id)
-        return profile.user
-    except Profile.DoesNotExist:
+    # Served from the rider cache; only core user fields are loaded, the rest load on access
+    return rider_resolver.resolve(rider_id)
+
+
+def request_rider_id(request, rider_id=None):
+    """The rider_id the request sent, or the one in its signed rider token when it sent none."""
+    if not rider_id and isinstance(request.auth, RiderToken):
+        return request.auth.rider_id
+    return rider_id
+
+
+def get_request_user(request, rider_id):
+    """
+    User for rider_id, for views that only need it as a foreign key. For the rider of
+    the request's signed token this is request.user; any other rider_id is resolved
+    through the rider cache as before.
+    A token outlives a deleted account, so the token's user is checked to still exist
+    (one primary-key query per request, instead of the rider lookup) and None is
+    returned when it does not, as for an unknown rider_id.
+    """
+    token = request.auth
+    if isinstance(token, RiderToken) and str(rider_id) == token.rider_id:
+        if not hasattr(request, 'token_user_exists'):
+            request.token_user_exists = User.objects.filter(pk=token.user_id).exists()
+        return request.user if request.token_user_exists else None
+    return get_user_by_rider_id(rider_id)
+
+
+def requested_fields(request, available):
+    """
+    The ?fields=a,b,c sparse fieldset as a set of names, or None when every field is wanted.
+    Raises ValueError naming any field the endpoint does not have.
+    """
+    raw = request.GET.get('fields')
+    if not raw:
+        return None
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = fields.difference(available)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}")
+    return fields or None
+
+
+def rider_data_etag(request, *args, **kwargs):
+    """
+    ETag for a per-rider read API: the rider's data version (bumped by every
+    Income/Expense/MutualFund/Profile write) plus a digest of the URL and the
+    negotiated media type, since ?fields= / msgpack change the body.
+    One primary-key read; None (no conditional handling) for unknown riders.
+    """
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
+    user = get_request_user(request, rider_id) if rider_id else None
+    if not user:
+        return None
+    version = RiderBalance.objects.filter(pk=user.pk).values_list('data_version', flat=True).first()
+    if version is None:
+        # No rollup yet; the view builds it
         return None
+    return rider_data_tag(user.pk, version, request.get_full_path(), getattr(request, 'accepted_media_type', ''))
+
+
+def rider_data_tag(user_id, version, full_path, media_type):
+    representation = f"{full_path}|{media_type}"
+    return f"{user_id}-{version}-{hashlib.blake2s(representation.encode(), digest_size=8).hexdigest()}"
+
+
+def rider_data_conditional(view=None, *, etag_func=rider_data_etag):
+    """
+    Answers If-None-Match with 304 from the rider's data version, before the view
+    runs any query of its own. Goes below @api_view so content negotiation has happened.
+    """
+    if view is None:
+        return lambda view: rider_data_conditional(view, etag_func=etag_func)
+    view = condition(etag_func=etag_func)(view)
+
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        return mark_rider_data(view(request, *args, **kwargs))
+    return inner
+
+
+def mark_rider_data(response):
+    """Per-rider data with an ETag: browsers keep it but revalidate every time, shared caches do not store it."""
+    if response.has_header('ETag'):
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 # --- Register API ---
 @method_decorator(csrf_exempt, name='dispatch')
 class RegisterView(views.APIView):
     def post(self, request):
-        email = request.data.get('email')
-        
-        # Check if email already exists
-        if email and User.objects.filter(email=email).exists():
-            return Response({
-                'error': 'Email already exists. Please try another email address.',
-                'field': 'email'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
+        # UserSerializer.validate_email does the one (case-insensitive) duplicate check
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -52,12 +150,20 @@ class RegisterView(views.APIView):
                     'username': user.username,
                     'email': user.email
                 }, status=status.HTTP_201_CREATED)
+            except PasswordPoolBusy:
+                raise  # 503 with Retry-After, not a failed registration
             except Exception as e:
                 return Response({
                     'error': 'Registration failed. Please try again.',
                     'details': str(e)
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        if any(error.code == 'unique' for error in serializer.errors.get('email', [])):
+            return Response({
+                'error': 'Email already exists. Please try another email address.',
+                'field': 'email'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         # Handle serializer errors with more specific messages
         errors = {}
         for field, field_errors in serializer.errors.items():
@@ -89,56 +195,41 @@ class LoginView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            # Find the user by their email address first.
-            user_obj = User.objects.get(email=email)
-            
-            # Now, authenticate using the found user's username and the provided password.
-            user = authenticate(username=user_obj.username, password=password)
-            
-            if user is not None:
-                profile = user.profile
-                return Response({
-                    'message': 'Login successful',
-                    'rider_id': profile.rider_id,
-                    'user_id': user.pk,
-                    'username': user.username
-                })
-            else:
-                # This case handles correct email but incorrect password.
-                return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        except User.DoesNotExist:
+        # Find the user by their email address first (case-insensitive, indexed).
+        # Emails are not unique in auth_user; the oldest account wins, as before.
+        user_obj = users_with_email(email).order_by('pk').first()
+        if user_obj is None:
             # This case handles an email that doesn't exist in the database.
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
-        
-        except User.MultipleObjectsReturned:
-            # This is an edge case if emails are not unique in your database.
-            # The first user found will be used for authentication attempt.
-            user_obj = User.objects.filter(email=email).first()
-            user = authenticate(username=user_obj.username, password=password)
-            if user is not None:
-                profile = user.profile
-                return Response({
-                    'message': 'Login successful',
-                    'rider_id': profile.rider_id,
-                    'user_id': user.pk,
-                    'username': user.username
-                })
-            else:
-                 return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Now, authenticate using the found user's username and the provided password.
+        user = authenticate(username=user_obj.username, password=password)
+
+        if user is not None:
+            profile = user.profile
+            return Response({
+                'message': 'Login successful',
+                'rider_id': profile.rider_id,
+                'user_id': user.pk,
+                'username': user.username,
+                # Send as "Authorization: Rider <token>"; rider_id can then be left out of API calls
+                'token': issue_rider_token(user.pk, profile.rider_id),
+            })
+        else:
+            # This case handles correct email but incorrect password.
+            return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ProfileView(views.APIView):
     permission_classes = [AllowAny]
     # Add parsers to handle JSON, file uploads, and form data
-    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    parser_classes = [FastJSONParser, MultiPartParser, FormParser]
 
     def get(self, request, *args, **kwargs):
         """
         Handles GET requests to fetch the user's combined profile data.
         """
-        rider_id = request.GET.get('rider_id')
+        rider_id = request_rider_id(request, request.GET.get('rider_id'))
         if not rider_id:
             return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -153,7 +244,7 @@ class ProfileView(views.APIView):
         """
         Handles POST requests to update user profile info.
         """
-        rider_id = request.data.get('rider_id')
+        rider_id = request_rider_id(request, request.data.get('rider_id'))
         if not rider_id:
             return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -177,7 +268,7 @@ class ProfileView(views.APIView):
         """
         Handles PATCH requests to update user info, including file uploads.
         """
-        rider_id = request.data.get('rider_id')
+        rider_id = request_rider_id(request, request.data.get('rider_id'))
         if not rider_id:
             return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -202,7 +293,7 @@ class ChangeEmailView(views.APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
-        rider_id = request.data.get('rider_id')
+        rider_id = request_rider_id(request, request.data.get('rider_id'))
         if not rider_id:
             return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -222,7 +313,8 @@ class ChangeEmailView(views.APIView):
             
             # --- THIS IS WHERE THE DATABASE IS UPDATED ---
             user.email = new_email
-            user.save() # This command saves the change to the database
+            # Only email: the cached user's other fields may be a few seconds old
+            user.save(update_fields=['email'])
             
             # Also update RiderInfo if it exists
             try:
@@ -246,7 +338,7 @@ class ChangePasswordView(views.APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
-        rider_id = request.data.get('rider_id')
+        rider_id = request_rider_id(request, request.data.get('rider_id'))
         if not rider_id:
             return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -266,7 +358,7 @@ class ChangePasswordView(views.APIView):
             # --- THIS IS WHERE THE DATABASE IS SECURELY UPDATED ---
             # user.set_password() handles the hashing for security
             user.set_password(new_password)
-            user.save() # This command saves the change to the database
+            user.save(update_fields=['password'])
             # --------------------------------------------------------
             
             return Response({"message": "Password updated successfully"}, status=status.HTTP_200_OK)
@@ -283,7 +375,7 @@ class DeleteAccountView(views.APIView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
-        rider_id = request.data.get('rider_id')
+        rider_id = request_rider_id(request, request.data.get('rider_id'))
         current_password = request.data.get('current_password')
         
         if not rider_id:
@@ -311,11 +403,11 @@ class DeleteAccountView(views.APIView):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def add_income(request):
-    rider_id = request.data.get('rider_id')
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -331,11 +423,11 @@ def add_income(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def add_expense(request):
-    rider_id = request.data.get('rider_id')
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -348,61 +440,604 @@ def add_expense(request):
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# --- Batch Income/Expense API ---
+BATCH_MAX_ROWS = 1000
+BATCH_INSERT_CHUNK = 500
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def add_transactions_batch(request):
+    """
+    Adds many incomes and expenses for one rider in a single request,
+    e.g. when a mobile client flushes its offline queue.
+    Example Request Body:
+    {
+        "rider_id": "12345678",
+        "transactions": [
+            {"type": "income", "source": "Salary", "amount": 5000, "date": "2025-01-01"},
+            {"type": "expense", "category": "Food", "amount": 250, "date": "2025-01-02", "notes": "Lunch"}
+        ]
+    }
+    Valid rows are inserted in one transaction; invalid rows are reported by index in "results".
+    """
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
+    if not rider_id:
+        return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    items = request.data.get('transactions')
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'transactions must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > BATCH_MAX_ROWS:
+        return Response({'error': f'At most {BATCH_MAX_ROWS} transactions can be sent at once'}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = get_request_user(request, rider_id)
+    if not user:
+        return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
+
+    results = [None] * len(items)
+    kinds = {
+        'income': (Income, IncomeSerializer, []),
+        'expense': (Expense, ExpenseSerializer, []),
+    }
+    for index, item in enumerate(items):
+        kind = item.get('type') if isinstance(item, dict) else None
+        if kind not in kinds:
+            results[index] = {'index': index, 'status': 'error', 'errors': {'type': ['Must be "income" or "expense".']}}
+        else:
+            kinds[kind][2].append(index)
+
+    # Validate each kind in one many=True pass; rows that fail are reported and skipped
+    to_insert = []
+    for kind, (model, serializer_class, indexes) in kinds.items():
+        if not indexes:
+            continue
+        serializer = serializer_class(data=[items[i] for i in indexes], many=True)
+        if not serializer.is_valid():
+            for index, errors in zip(list(indexes), serializer.errors):
+                if errors:
+                    results[index] = {'index': index, 'status': 'error', 'errors': errors}
+            indexes[:] = [i for i in indexes if results[i] is None]
+            if not indexes:
+                continue
+            serializer = serializer_class(data=[items[i] for i in indexes], many=True)
+            serializer.is_valid(raise_exception=True)
+        to_insert.extend(
+            (index, kind, model(user=user, **validated))
+            for index, validated in zip(indexes, serializer.validated_data)
+        )
+
+    if to_insert:
+        with transaction.atomic():
+            for kind, (model, _, _) in kinds.items():
+                entries = [entry for _, entry_kind, entry in to_insert if entry_kind == kind]
+                if entries:
+                    _bulk_insert_ledger(model, user.pk, entries)
+            # bulk_create skips post_save, so update the rollups here
+            record_bulk_entries(user.pk, [entry for _, _, entry in to_insert])
+
+    for index, kind, entry in to_insert:
+        results[index] = {'index': index, 'status': 'created', 'type': kind, 'id': entry.pk}
+
+    created = len(to_insert)
+    if created == len(items):
+        response_status = status.HTTP_201_CREATED
+    elif created:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+
+    return Response({
+        'message': f'{created} of {len(items)} transactions added',
+        'created': created,
+        'failed': len(items) - created,
+        'results': results,
+    }, status=response_status)
+
+def _bulk_insert_ledger(model, user_id, entries):
+    """
+    bulk_create for one rider's Income or Expense rows, with their ids set even where the
+    backend does not return them (MySQL): auto-increment ids rise in insert order, so they
+    are read back as the rider's ids above the highest one before the insert. A row the rider
+    added concurrently would make the counts differ; the ids are then left as None.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(entries, batch_size=BATCH_INSERT_CHUNK)
+        return
+    ledger = model.objects.filter(user_id=user_id)
+    before = ledger.aggregate(last=Max('pk'))['last'] or 0
+    model.objects.bulk_create(entries, batch_size=BATCH_INSERT_CHUNK)
+    ids = list(ledger.filter(pk__gt=before).order_by('pk').values_list('pk', flat=True))
+    if len(ids) == len(entries):
+        for entry, pk in zip(entries, ids):
+            entry.pk = pk
+
+
+PROVISION_MAX_ROWS = 50000
+
+
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAdminUser])
+@parser_classes([FastJSONParser, MultiPartParser, FormParser])
+def provision_riders_api(request):
+    """
+    Creates many riders at once, e.g. a partner company's fleet. Staff only
+    (log in through /admin/ first).
+    Send either a JSON body {"riders": [{"email": ..., "first_name": ..., "last_name": ...,
+    "password": ..., "location": ...}, ...]} or a multipart upload "file" (.csv or .json).
+    Every rider needs a password (at least 6 characters): there is no reset flow.
+    Each row is reported by index in "results" with its rider_id or its errors.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        fmt = 'json' if upload.name.lower().endswith('.json') else 'csv'
+        try:
+            rows = read_riders(upload, fmt)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return Response({'error': f'Could not read {upload.name}: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        rows = request.data.get('riders')
+
+    if not isinstance(rows, list) or not rows:
+        return Response({'error': 'riders must be a non-empty list or a file upload'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > PROVISION_MAX_ROWS:
+        return Response({'error': f'At most {PROVISION_MAX_ROWS} riders can be sent at once'}, status=status.HTTP_400_BAD_REQUEST)
+
+    created, results = provision_riders(rows, workers=getattr(settings, 'PROVISION_HASH_WORKERS', None),
+                                        pool=provision_pool)
+
+    if created == len(rows):
+        response_status = status.HTTP_201_CREATED
+    elif created:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+
+    return Response({
+        'message': f'{created} of {len(rows)} riders provisioned',
+        'created': created,
+        'failed': len(rows) - created,
+        'results': results,
+    }, status=response_status)
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@rider_data_conditional
 def dashboard_data(request):
-    rider_id = request.GET.get('rider_id')
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
-    if not user:
+    user = get_request_user(request, rider_id)
+    totals = _dashboard_totals(user) if user else None
+    if totals is None:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
 
-    total_income = user.incomes.aggregate(total=Sum('amount'))['total'] or 0
-    total_expense = user.expenses.aggregate(total=Sum('amount'))['total'] or 0
-    total_saving = total_income - total_expense
-    balance = total_saving  # can customize if needed
+    return Response(totals)
 
-    return Response({
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "total_saving": total_saving,
+
+def _dashboard_totals(user):
+    """The dashboard payload, or None when the user no longer exists."""
+    # Totals are maintained incrementally, so this is a single primary-key read
+    try:
+        rollup = RiderBalance.objects.get(pk=user.pk)
+    except RiderBalance.DoesNotExist:
+        rollup = _first_balance(user.pk)
+        if rollup is None:
+            return None
+    return _balance_payload(rollup)
+
+
+def _first_balance(user_id):
+    """
+    Builds the rollup of a user created before rollups existed, on their first visit.
+    None when the user is gone: a rider token outlives its account, and the rollup
+    row would otherwise be inserted for a deleted user.
+    """
+    if not User.objects.filter(pk=user_id).exists():
+        return None
+    return RiderBalance.rebuild_for(user_id)
+
+
+def _balance_payload(rollup):
+    balance = rollup.total_saving  # can customize if needed
+
+    return {
+        "total_income": rollup.total_income,
+        "total_expense": rollup.total_expense,
+        "total_saving": rollup.total_saving,
         "balance": balance
-    })
+    }
 
 # --- Recent Transactions API ---
+# Incomes carry 'source' and expenses 'category'; ?fields= may name either
+RECENT_TRANSACTION_FIELDS = ['id', 'source', 'category', 'amount', 'date', 'notes', 'created_at']
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@rider_data_conditional
 def recent_transactions(request):
-    rider_id = request.GET.get('rider_id')
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    try:
+        fields = requested_fields(request, RECENT_TRANSACTION_FIELDS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
 
-    incomes = Income.objects.filter(user=user).order_by('-date')[:5]
-    expenses = Expense.objects.filter(user=user).order_by('-date')[:5]
+    transactions = _recent_transactions(user, wants_native_types(request), fields)
+    return Response({"transactions": transactions}, status=status.HTTP_200_OK)
+
+
+def _recent_ledger(model, user_id):
+    # Full index order so the (user, date, created_at, id) index serves the sort
+    return model.objects.filter(user_id=user_id).order_by('-date', '-created_at', '-id')[:5]
 
-    income_serializer = IncomeSerializer(incomes, many=True)
-    expense_serializer = ExpenseSerializer(expenses, many=True)
 
+def _recent_columns(fields):
+    # Only the requested columns are read, plus date for the merge
+    return None if fields is None else fields | {'date'}
+
+
+def _recent_transactions(user, native=False, fields=None):
+    # Same output as IncomeSerializer/ExpenseSerializer(many=True), without building model instances
+    # (binary renderers get Decimal/date values instead of strings).
+    read = _recent_columns(fields)
+    return _merge_transactions(
+        fast_income_list.data(_recent_ledger(Income, user.pk), native, read),
+        fast_expense_list.data(_recent_ledger(Expense, user.pk), native, read),
+        fields,
+    )
+
+
+def _merge_transactions(incomes, expenses, fields):
     # Merge and sort by date descending
-    transactions = income_serializer.data + expense_serializer.data
+    transactions = incomes + expenses
     transactions.sort(key=lambda x: x['date'], reverse=True)
+    if fields is not None and 'date' not in fields:
+        for transaction_row in transactions:
+            del transaction_row['date']
+        # e.g. ?fields=source: expenses have none of the requested columns, so they are left out rather than sent as {}
+        transactions = [transaction_row for transaction_row in transactions if transaction_row]
+    return transactions
 
-    return Response({"transactions": transactions}, status=status.HTTP_200_OK)
+# --- Transaction History API ---
+TRANSACTION_PAGE_SIZE = 20
+TRANSACTION_MAX_PAGE_SIZE = 100
+# 'kind' breaks ties between an income and an expense that share an id
+TRANSACTION_ORDERING = ('-date', '-created_at', '-kind', '-id')
+# Within one side 'kind' is constant; leaving it out lets the (user, date, created_at, id) index serve the sort
+TRANSACTION_BRANCH_ORDERING = ('-date', '-created_at', '-id')
+
+
+def _parse_transaction_params(params):
+    """Validate the history filters; raises ValueError with a user-facing message."""
+    parsed = {}
+    try:
+        parsed['start'] = date.fromisoformat(params['start']) if params.get('start') else None
+        parsed['end'] = date.fromisoformat(params['end']) if params.get('end') else None
+    except ValueError:
+        raise ValueError('start and end must be dates in YYYY-MM-DD format')
+
+    try:
+        parsed['min_amount'] = Decimal(params['min_amount']) if params.get('min_amount') else None
+        parsed['max_amount'] = Decimal(params['max_amount']) if params.get('max_amount') else None
+    except InvalidOperation:
+        raise ValueError('min_amount and max_amount must be numbers')
+
+    parsed['type'] = params.get('type')
+    if parsed['type'] not in (None, '', 'income', 'expense'):
+        raise ValueError('type must be "income" or "expense"')
+
+    try:
+        parsed['limit'] = min(int(params.get('limit', TRANSACTION_PAGE_SIZE)), TRANSACTION_MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('limit must be a number')
+    if parsed['limit'] < 1:
+        raise ValueError('limit must be at least 1')
+
+    parsed['cursor'] = None
+    if params.get('cursor'):
+        try:
+            cursor_date, cursor_created_at, cursor_kind, cursor_id = decode_cursor(params['cursor'])
+            if cursor_kind not in ('income', 'expense'):
+                raise ValueError('Invalid cursor')
+            parsed['cursor'] = (
+                date.fromisoformat(cursor_date),
+                datetime.fromisoformat(cursor_created_at),
+                cursor_kind,
+                int(cursor_id),
+            )
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+
+    parsed['labels'] = {field: params[field] for field in ('source', 'category') if params.get(field)}
+    return parsed
+
+
+def _filtered_ledger(model, user, params):
+    """One rider's Income or Expense rows narrowed by the history filters, or None if the filters exclude the model."""
+    kind = model.LEDGER_KIND
+    label_field = model.LEDGER_LABEL_FIELD
+    if params['type'] and params['type'] != kind:
+        return None
+    # source only applies to incomes and category only to expenses
+    if params['labels'] and label_field not in params['labels']:
+        return None
+
+    queryset = model.objects.filter(user=user)
+    if label_field in params['labels']:
+        queryset = queryset.filter(**{label_field: params['labels'][label_field]})
+    if params['start']:
+        queryset = queryset.filter(date__gte=params['start'])
+    if params['end']:
+        queryset = queryset.filter(date__lte=params['end'])
+    if params['min_amount'] is not None:
+        queryset = queryset.filter(amount__gte=params['min_amount'])
+    if params['max_amount'] is not None:
+        queryset = queryset.filter(amount__lte=params['max_amount'])
+    return queryset
+
+
+def _transaction_rows(queryset, model):
+    """Project ledger rows onto the shared shape TransactionSerializer reads."""
+    return queryset.annotate(
+        kind=Value(model.LEDGER_KIND, output_field=CharField()),
+        label=F(model.LEDGER_LABEL_FIELD),
+    ).values('id', 'amount', 'date', 'notes', 'created_at', 'kind', 'label')
+
+
+def _transaction_branch(model, user, params):
+    """One side (Income or Expense) of the history UNION, or None if the filters exclude it."""
+    queryset = _filtered_ledger(model, user, params)
+    if queryset is None:
+        return None
+
+    if params['cursor']:
+        # Keyset condition: everything that sorts after the cursor row
+        kind = model.LEDGER_KIND
+        cursor_date, cursor_created_at, cursor_kind, cursor_id = params['cursor']
+        after = Q(date__lt=cursor_date) | Q(date=cursor_date, created_at__lt=cursor_created_at)
+        if kind < cursor_kind:
+            after |= Q(date=cursor_date, created_at=cursor_created_at)
+        elif kind == cursor_kind:
+            after |= Q(date=cursor_date, created_at=cursor_created_at, id__lt=cursor_id)
+        queryset = queryset.filter(after)
+
+    return _transaction_rows(queryset, model)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def transaction_history(request):
+    """
+    Full income + expense history, newest first, merged with a UNION in the database.
+    Query params (only rider_id is required):
+      type (income/expense), start / end (YYYY-MM-DD), source, category,
+      min_amount / max_amount, limit (default 20, max 100), cursor (next_cursor of the previous page)
+    Pages are keyset based on (date, created_at, type, id), so page N costs the same as page 1.
+    """
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
+    if not rider_id:
+        return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        params = _parse_transaction_params(request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = get_request_user(request, rider_id)
+    if not user:
+        return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
+
+    limit = params['limit']
+    branches = [
+        branch for branch in (_transaction_branch(model, user, params) for model in (Income, Expense))
+        if branch is not None
+    ]
+
+    if not branches:
+        rows = []
+    elif len(branches) == 1:
+        rows = list(branches[0].order_by(*TRANSACTION_BRANCH_ORDERING)[:limit + 1])
+    else:
+        if connection.features.supports_slicing_ordering_in_compound:
+            # Let each side stop after limit + 1 rows instead of feeding the whole history into the UNION
+            branches = [branch.order_by(*TRANSACTION_BRANCH_ORDERING)[:limit + 1] for branch in branches]
+        combined = branches[0].union(*branches[1:], all=True)
+        rows = list(combined.order_by(*TRANSACTION_ORDERING)[:limit + 1])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([last['date'].isoformat(), last['created_at'].isoformat(), last['kind'], last['id']])
+
+    return Response({
+        'transactions': TransactionSerializer(rows, many=True).data,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }, status=status.HTTP_200_OK)
+
+# --- Transaction Export ---
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = ['type', 'id', 'date', 'created_at', 'source', 'category', 'amount', 'notes']
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each written line straight back."""
+    def write(self, value):
+        return value
+
+
+def _iter_keyset(queryset, chunk_size):
+    """
+    Yield transaction rows oldest first, one keyset page at a time, so memory stays flat.
+    MySQL has no server-side cursors in Django (.iterator() still buffers the whole
+    result), so pages are read on the (user, date, created_at, id) index instead.
+    """
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            last_date, last_created_at, last_id = last
+            page = page.filter(
+                Q(date__gt=last_date)
+                | Q(date=last_date, created_at__gt=last_created_at)
+                | Q(date=last_date, created_at=last_created_at, id__gt=last_id)
+            )
+        rows = list(page.order_by('date', 'created_at', 'id')[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1]['date'], rows[-1]['created_at'], rows[-1]['id'])
+
+
+@require_GET
+def export_transactions(request):
+    """
+    Streams a rider's whole transaction history, oldest first.
+    Query params: rider_id, format ("csv" or "ndjson", default "csv") and the
+    type / start / end / source / category / min_amount / max_amount filters of /api/transactions/.
+    This is a plain Django view because DRF reserves ?format= for picking a renderer;
+    the rider token is checked here as RiderTokenAuthentication does for the DRF views.
+    """
+    try:
+        authenticate_rider_request(request)
+    except AuthenticationFailed as e:
+        response = JsonResponse({'detail': e.detail}, status=e.status_code)
+        response['WWW-Authenticate'] = RiderTokenAuthentication.keyword
+        return response
+
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
+    if not rider_id:
+        return JsonResponse({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return JsonResponse({'error': 'format must be "csv" or "ndjson"'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        params = _parse_transaction_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = get_request_user(request, rider_id)
+    if not user:
+        return JsonResponse({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
+
+    streams = []
+    for model in (Income, Expense):
+        queryset = _filtered_ledger(model, user, params)
+        if queryset is not None:
+            streams.append(_iter_keyset(_transaction_rows(queryset, model), EXPORT_CHUNK_SIZE))
+    # Both streams are already sorted, so merging them only holds one row of each
+    rows = heapq.merge(*streams, key=lambda row: (row['date'], row['created_at'], row['kind'], row['id']))
+
+    # Same field formatting as the JSON API, with one serializer reused for every row
+    serializer = TransactionSerializer()
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        def encode(data):
+            return writer.writerow([data.get(column) for column in EXPORT_COLUMNS])
+        header = [writer.writerow(EXPORT_COLUMNS)]
+        content_type = 'text/csv'
+    else:
+        def encode(data):
+            return json.dumps(data) + '\n'
+        header = []
+        content_type = 'application/x-ndjson'
+
+    def generate():
+        lines = header
+        for row in rows:
+            lines.append(encode(serializer.to_representation(row)))
+            if len(lines) >= 500:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    response = StreamingHttpResponse(generate(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="transactions-{rider_id}.{export_format}"'
+    return response
+
+# --- Analytics API ---
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def analytics_api(request):
+    """
+    Income/expense breakdown by period and by category for a date range.
+    Reads the precomputed DailySummary rows, never the raw ledger.
+    Query params: rider_id, start / end (YYYY-MM-DD, optional), period ("day" or "month", default "month")
+    """
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
+    if not rider_id:
+        return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return Response({'error': 'start and end must be dates in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+
+    period = request.GET.get('period', 'month')
+    if period not in ('day', 'month'):
+        return Response({'error': 'period must be "day" or "month"'}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = get_request_user(request, rider_id)
+    if not user:
+        return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
+
+    summaries = DailySummary.objects.filter(user=user)
+    if start:
+        summaries = summaries.filter(day__gte=start)
+    if end:
+        summaries = summaries.filter(day__lte=end)
+
+    zero = Decimal('0.00')
+    totals = {'income': zero, 'expense': zero}
+    series = {}
+    categories = {}
+    for day, kind, category, total, entry_count in summaries.values_list('day', 'kind', 'category', 'total', 'entry_count'):
+        key = day.isoformat() if period == 'day' else day.strftime('%Y-%m')
+        point = series.setdefault(key, {'period': key, 'income': zero, 'expense': zero})
+        point[kind] += total
+        totals[kind] += total
+
+        bucket = categories.setdefault((kind, category), {'kind': kind, 'category': category, 'total': zero, 'count': 0})
+        bucket['total'] += total
+        bucket['count'] += entry_count
+
+    return Response({
+        'start': start,
+        'end': end,
+        'period': period,
+        'totals': {
+            'income': totals['income'],
+            'expense': totals['expense'],
+            'saving': totals['income'] - totals['expense'],
+        },
+        'series': [series[key] for key in sorted(series)],
+        'by_category': sorted(categories.values(), key=lambda c: (c['kind'], -c['total'])),
+    }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def add_fund_api(request):
-    rider_id = request.data.get('rider_id')
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -416,27 +1051,34 @@ def add_fund_api(request):
 # Funds List API
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@rider_data_conditional
 def funds_list_api(request):
-    rider_id = request.GET.get('rider_id')
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    try:
+        fields = requested_fields(request, fast_mutual_fund_list.field_names)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
     
-    funds = MutualFund.objects.filter(user=user).order_by('-created_at')
-    serializer = MutualFundSerializer(funds, many=True)
-    return Response(serializer.data)
+    funds = MutualFund.objects.filter(user=user).order_by('-created_at', '-id')
+    # Same output as MutualFundSerializer(funds, many=True), without building model instances;
+    # with ?fields= only those columns are selected
+    return Response(fast_mutual_fund_list.data(funds, wants_native_types(request), fields))
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def update_fund_api(request, fund_id):
-    rider_id = request.data.get('rider_id')
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -464,7 +1106,7 @@ def delete_fund_api(request):
     """
     # Get the rider_id and fund_id from the JSON request body
     try:
-        rider_id = request.data.get('rider_id')
+        rider_id = request_rider_id(request, request.data.get('rider_id'))
         fund_id = request.data.get('fund_id')
     except AttributeError:
         return Response(
@@ -485,7 +1127,7 @@ def delete_fund_api(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    user = get_user_by_rider_id(rider_id)
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -504,28 +1146,34 @@ def delete_fund_api(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@rider_data_conditional
 def portfolio_summary_api(request):
-    rider_id = request.GET.get('rider_id')
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    user = get_user_by_rider_id(rider_id)
+    user = get_request_user(request, rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
 
     # Get all funds for the current user
     user_funds = MutualFund.objects.filter(user=user)
 
+    summary_data = user_funds.aggregate(**_portfolio_totals())
+    response_payload = _portfolio_summary(summary_data['total_invested'], summary_data['total_current'])
+    return Response(response_payload, status=status.HTTP_200_OK)
+
+
+def _portfolio_totals():
     # Use the aggregate function to calculate sums efficiently in the database.
     # Coalesce is used to handle the case where a user has no funds, returning 0 instead of None.
-    summary_data = user_funds.aggregate(
-        total_invested=Coalesce(Sum('invested_amount'), 0, output_field=DecimalField()),
-        total_current=Coalesce(Sum('current_value'), 0, output_field=DecimalField())
-    )
+    return {
+        'total_invested': Coalesce(Sum('invested_amount'), 0, output_field=DecimalField()),
+        'total_current': Coalesce(Sum('current_value'), 0, output_field=DecimalField()),
+    }
 
-    total_invested = summary_data['total_invested']
-    total_current_value = summary_data['total_current']
-    
+
+def _portfolio_summary(total_invested, total_current_value):
     # Calculate derived values
     total_gain_loss = total_current_value - total_invested
     
@@ -536,68 +1184,143 @@ def portfolio_summary_api(request):
         total_gain_loss_percentage = 0
 
     # Prepare the final response data
-    response_payload = {
+    return {
         "total_invested": total_invested,
         "total_current_value": total_current_value,
         "total_gain_loss": total_gain_loss,
         "total_gain_loss_percentage": round(total_gain_loss_percentage, 2)
     }
-    
-    return Response(response_payload, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def market_data_api(request):
     """
     Acts as a proxy to fetch live market data for NSE indices.
-    This view is designed to be robust and handle potential API failures gracefully.
+    Served from the shared in-process cache, so viewers polling the dashboard
+    cost at most one upstream call per TTL; failures fall back to the last good
+    data or to an "Unavailable" payload. A request never waits more than
+    MARKET_DATA_WAIT_BUDGET for NSE, and while NSE keeps failing the circuit
+    breaker answers from the fallback without calling it (state in /api/metrics/).
     """
-    NSE_URL = 'https://www.nseindia.com/api/allIndices'
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    return Response(market_data_cache.get(), status=status.HTTP_200_OK)
 
-    response_data = {
-        "marketStatus": "Unavailable", # Changed default from "Error"
-        "nifty50": None,
-        "nifty100": None,
-        "bankNifty": None
-    }
+# --- Dashboard Bootstrap API ---
+# Each part is the body of the endpoint it replaces; market is not rider data and is only sent when asked for
+BOOTSTRAP_VIEWS = ['dashboard', 'recent', 'funds', 'summary', 'profile', 'market']
+BOOTSTRAP_DEFAULT_VIEWS = ['dashboard', 'recent', 'funds', 'summary', 'profile']
+
+
+def _bootstrap_views(request):
+    raw = request.GET.get('views')
+    if not raw:
+        return list(BOOTSTRAP_DEFAULT_VIEWS)
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = names.difference(BOOTSTRAP_VIEWS)
+    if unknown or not names:
+        raise ValueError(f"Unknown views: {', '.join(sorted(unknown))}. Available: {', '.join(BOOTSTRAP_VIEWS)}")
+    return [name for name in BOOTSTRAP_VIEWS if name in names]
 
+
+def bootstrap_etag(request, *args, **kwargs):
+    # Market data changes without any rider write, so payloads that include it are never 304'd
     try:
-        # Fetch NSE Data
-        nse_response = requests.get(NSE_URL, headers=HEADERS, timeout=5)
-        nse_response.raise_for_status()
-        nse_data = nse_response.json()
-        
-        response_data["marketStatus"] = nse_data.get("marketStatus", "Unavailable")
+        if 'market' in _bootstrap_views(request):
+            return None
+    except ValueError:
+        return None
+    return rider_data_etag(request)
 
-        # Helper to find an index by its exact name
-        def find_index(data, index_name):
-            return next((item for item in data if item.get("index") == index_name), None)
 
-        nifty50_data = find_index(nse_data.get("data", []), "NIFTY 50")
-        nifty100_data = find_index(nse_data.get("data", []), "NIFTY 100")
-        bankNifty_data = find_index(nse_data.get("data", []), "NIFTY BANK")
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@rider_data_conditional(etag_func=bootstrap_etag)
+def bootstrap_api(request):
+    """
+    Everything a dashboard page needs in one request: the rider is resolved once
+    and each requested part runs only its own queries.
+    Query params: rider_id, views=dashboard,recent,funds,summary,profile,market
+    (default: all but market). Each key holds what the matching endpoint returns.
+    """
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
+    if not rider_id:
+        return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Helper to format the index data
-        def format_index_data(name, data):
-            if not data: return None
-            return {
-                "name": name, "value": data["last"], "change": data["variation"],
-                "percentChange": data["percentChange"], "open": data["open"],
-                "high": data["high"], "low": data["low"], "prevClose": data["previousClose"]
-            }
+    try:
+        parts = _bootstrap_views(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        response_data["nifty50"] = format_index_data("NIFTY 50", nifty50_data)
-        response_data["nifty100"] = format_index_data("NIFTY 100", nifty100_data)
-        response_data["bankNifty"] = format_index_data("NIFTY BANK", bankNifty_data)
+    user = get_request_user(request, rider_id)
+    if not user:
+        return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
 
-    except requests.exceptions.RequestException as e:
-        print(f"CRITICAL: Error fetching NSE data: {e}")
-        # On failure, the marketStatus will remain "Unavailable"
+    native = wants_native_types(request)
+    data = {'rider_id': rider_id}
+    if 'dashboard' in parts:
+        data['dashboard'] = _dashboard_totals(user)
+        if data['dashboard'] is None:
+            return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
+    if 'recent' in parts:
+        data['recent'] = {'transactions': _recent_transactions(user, native)}
+    if 'funds' in parts:
+        rows = list(fast_mutual_fund_list.values_list(
+            MutualFund.objects.filter(user=user).order_by('-created_at', '-id')
+        ))
+        data['funds'] = fast_mutual_fund_list.serialize(rows, native)
+        if 'summary' in parts:
+            # The fund rows are already here, so the totals need no aggregate query
+            names = fast_mutual_fund_list.field_names
+            invested, current = names.index('invested_amount'), names.index('current_value')
+            data['summary'] = _portfolio_summary(
+                sum((row[invested] for row in rows), Decimal('0')),
+                sum((row[current] for row in rows), Decimal('0')),
+            )
+    elif 'summary' in parts:
+        summary_data = MutualFund.objects.filter(user=user).aggregate(**_portfolio_totals())
+        data['summary'] = _portfolio_summary(summary_data['total_invested'], summary_data['total_current'])
+    if 'profile' in parts:
+        # Needs the user's own fields, which a token's user does not carry
+        data['profile'] = UserProfileSerializer(get_user_by_rider_id(rider_id)).data
+    if 'market' in parts:
+        data['market'] = market_data_cache.get()
+
+    return Response(data, status=status.HTTP_200_OK)
+
+# --- Market Data Stream (Server-Sent Events) ---
+async def market_data_stream(request):
+    """
+    Pushes NIFTY 50 / NIFTY 100 / NIFTY BANK changes to the browser as they happen.
+    One background poller per process feeds every subscriber, and only changed values are sent.
+    Needs the ASGI app (ExpenseTracker/asgi.py); under WSGI a long-lived stream would tie up
+    a worker, so it answers 503 and the dashboard keeps polling /api/market-data/.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Live market updates need the ASGI server; poll /api/market-data/ instead'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
 
-    return Response(response_data, status=status.HTTP_200_OK)
+    response = StreamingHttpResponse(
+        market_event_stream(market_broadcaster, max_duration=settings.MARKET_STREAM_MAX_DURATION),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+# --- Metrics API ---
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def metrics_api(request):
+    """Counters for the in-process caches, for dashboards and load tests."""
+    return Response({
+        'rider_resolver': rider_resolver.stats(),
+        'market_data': market_data_cache.stats(),
+        'market_stream_subscribers': market_broadcaster.subscriber_count(),
+        'password_pool': password_pool.stats(),
+    }, status=status.HTTP_200_OK)
 
 def home(request):
     return JsonResponse({"message": "Welcome to the Expense Tracker API"})
@@ -610,7 +1333,7 @@ def get_personal_info(request):
     API to get personal information (first_name, last_name, username, email)
     Pass rider_id in request body
     """
-    rider_id = request.data.get('rider_id')
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
@@ -632,7 +1355,7 @@ def update_personal_info(request):
     """
     API to update personal information (first_name and last_name only)
     """
-    rider_id = request.data.get('rider_id')
+    rider_id = request_rider_id(request, request.data.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
@@ -667,12 +1390,16 @@ def update_personal_info(request):
         return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
     
     # Update the user fields
+    changed = []
     if first_name is not None:
         user.first_name = first_name.strip()
+        changed.append('first_name')
     if last_name is not None:
         user.last_name = last_name.strip()
+        changed.append('last_name')
     
-    user.save()
+    # Only what changed: the cached user's other fields may be a few seconds old
+    user.save(update_fields=changed)
     
     # Also update RiderInfo if it exists
     try:
@@ -693,18 +1420,27 @@ def update_personal_info(request):
     }, status=status.HTTP_200_OK)
 
 # --- Get User Info by Rider ID API ---
+USER_INFO_FIELDS = ['rider_id', 'user_id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'last_login']
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_user_info(request):
-    rider_id = request.GET.get('rider_id')
+    rider_id = request_rider_id(request, request.GET.get('rider_id'))
     if not rider_id:
         return Response({'error': 'rider_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
+    try:
+        fields = requested_fields(request, USER_INFO_FIELDS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Every field comes from the rider cache's core user columns, so this is usually no query at all
     user = get_user_by_rider_id(rider_id)
     if not user:
         return Response({'error': 'Invalid rider_id'}, status=status.HTTP_404_NOT_FOUND)
     
-    return Response({
+    data = {
         'rider_id': rider_id,
         'user_id': user.pk,
         'username': user.username,
@@ -713,50 +1449,143 @@ def get_user_info(request):
         'last_name': user.last_name,
         'date_joined': user.date_joined,
         'last_login': user.last_login
-    }, status=status.HTTP_200_OK)
+    }
+    if fields is not None:
+        data = {key: value for key, value in data.items() if key in fields}
+    return Response(data, status=status.HTTP_200_OK)
 
 # --- Get All Riders (for admin purposes) ---
+RIDER_DIRECTORY_LIMIT = 100
+RIDER_DIRECTORY_MAX_LIMIT = 1000
+RIDER_DIRECTORY_ORDERING = ('-created_at', '-rider_id')
+# response key -> column, all read in one query joining auth_user and accounts_profile
+RIDER_DIRECTORY_COLUMNS = {
+    'rider_id': 'rider_id',
+    'user_id': 'user_id',
+    'username': 'username',
+    'email': 'email',
+    'first_name': 'user__first_name',
+    'last_name': 'user__last_name',
+    'date_joined': 'user__date_joined',
+    'last_login': 'user__last_login',
+    'location': 'user__profile__location',
+    'is_active': 'is_active',
+    'rider_created_at': 'created_at',
+    'last_activity': 'last_activity',
+}
+
+
+# The keyset cursor is built from these, so they are read even when ?fields= leaves them out
+RIDER_DIRECTORY_CURSOR_KEYS = ('rider_created_at', 'rider_id')
+
+
+def _rider_directory_page(cursor, limit, fields=None):
+    """
+    One keyset page of riders, newest first, as plain dicts.
+    fields limits the keys (and so the columns and joins) to a subset of RIDER_DIRECTORY_COLUMNS.
+    """
+    queryset = RiderInfo.objects.all()
+    if cursor is not None:
+        created_at, rider_id = cursor
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, rider_id__lt=rider_id)
+        )
+    keys = [
+        key for key in RIDER_DIRECTORY_COLUMNS
+        if fields is None or key in fields or key in RIDER_DIRECTORY_CURSOR_KEYS
+    ]
+    rows = queryset.order_by(*RIDER_DIRECTORY_ORDERING).values_list(*(RIDER_DIRECTORY_COLUMNS[key] for key in keys))[:limit]
+    riders = [dict(zip(keys, row)) for row in rows]
+    if 'location' in keys:
+        for rider in riders:
+            # No profile row: the LEFT JOIN gives NULL
+            rider['location'] = rider['location'] or ""
+    return riders
+
+
+def _trim_rider_directory(riders, fields):
+    """Drops the cursor keys read for paging but not asked for in ?fields=."""
+    if fields is None:
+        return riders
+    unwanted = [key for key in RIDER_DIRECTORY_CURSOR_KEYS if key not in fields]
+    if not unwanted:
+        return riders
+    return [{key: value for key, value in rider.items() if key not in unwanted} for rider in riders]
+
+
+def _decode_rider_cursor(value):
+    values = decode_cursor(value)
+    if len(values) != 2 or not all(isinstance(v, str) for v in values):
+        raise ValueError('Invalid cursor')
+    # parse_datetime raises ValueError itself for well-formed but impossible values
+    created_at = parse_datetime(values[0])
+    if created_at is None:
+        raise ValueError('Invalid cursor')
+    return created_at, values[1]
+
+
+def _stream_rider_directory(fields=None):
+    encoder = DRFJSONEncoder()
+    cursor = None
+    while True:
+        riders = _rider_directory_page(cursor, RIDER_DIRECTORY_MAX_LIMIT, fields)
+        if riders:
+            yield ''.join(encoder.encode(rider) + '\n' for rider in _trim_rider_directory(riders, fields))
+        if len(riders) < RIDER_DIRECTORY_MAX_LIMIT:
+            return
+        cursor = (riders[-1]['rider_created_at'], riders[-1]['rider_id'])
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_all_riders(request):
-    """Get all riders with their basic info"""
+    """
+    Get all riders with their basic info, newest first.
+    Query params: limit (default 100, max 1000), cursor (next_cursor of the previous page),
+    stream=1 to download every rider as NDJSON instead of paging,
+    fields=rider_id,email,... to return (and read) only those rider keys.
+    total_riders / active_riders are counted in the database and only returned on the first page.
+    """
     try:
-        riders_info = RiderInfo.objects.select_related('user').all()
-        riders_data = []
-        
-        for rider_info in riders_info:
-            user = rider_info.user
-            try:
-                profile = user.profile
-                location = profile.location
-                profile_created = profile.created_at
-            except Profile.DoesNotExist:
-                location = ""
-                profile_created = None
-            
-            riders_data.append({
-                'rider_id': rider_info.rider_id,
-                'user_id': user.pk,
-                'username': rider_info.username,
-                'email': rider_info.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'date_joined': user.date_joined,
-                'last_login': user.last_login,
-                'location': location,
-                'is_active': rider_info.is_active,
-                'rider_created_at': rider_info.created_at,
-                'last_activity': rider_info.last_activity
-            })
-        
-        return Response({
-            'total_riders': len(riders_data),
-            'active_riders': len([r for r in riders_data if r['is_active']]),
-            'riders': riders_data
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        fields = requested_fields(request, list(RIDER_DIRECTORY_COLUMNS))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.GET.get('stream') in ('1', 'true'):
+        response = StreamingHttpResponse(_stream_rider_directory(fields), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="riders.ndjson"'
+        return response
+
+    try:
+        limit = int(request.GET.get('limit', RIDER_DIRECTORY_LIMIT))
+        if not 1 <= limit <= RIDER_DIRECTORY_MAX_LIMIT:
+            raise ValueError
+    except ValueError:
+        return Response({'error': f'limit must be between 1 and {RIDER_DIRECTORY_MAX_LIMIT}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cursor = request.GET.get('cursor')
+    try:
+        cursor = _decode_rider_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    riders = _rider_directory_page(cursor, limit + 1, fields)
+    has_more = len(riders) > limit
+    riders = riders[:limit]
+    next_cursor = None
+    if has_more:
+        last = riders[-1]
+        next_cursor = encode_cursor([last['rider_created_at'].isoformat(), last['rider_id']])
+    riders = _trim_rider_directory(riders, fields)
+
+    data = {}
+    if cursor is None:
+        data = RiderInfo.objects.aggregate(
+            total_riders=Count('pk'),
+            active_riders=Count('pk', filter=Q(is_active=True)),
+        )
+    data.update({'riders': riders, 'next_cursor': next_cursor, 'has_more': has_more})
+    return Response(data, status=status.HTTP_200_OK)
 
 # --- Get Rider by Email ---
 @api_view(['GET'])
@@ -768,7 +1597,7 @@ def get_rider_by_email(request):
         return Response({'error': 'email is required'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        rider_info = RiderInfo.objects.select_related('user').get(email=email)
+        rider_info = riders_with_email(email).select_related('user').get()
         user = rider_info.user
         
         return Response({
@@ -802,7 +1631,7 @@ def verify_rider_email(request):
         return Response({'error': 'Both rider_id and email are required'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        rider_info = RiderInfo.objects.get(rider_id=rider_id, email=email)
+        rider_info = riders_with_email(email).get(rider_id=rider_id)
         return Response({
             'verified': True,
             'rider_id': rider_info.rider_id,
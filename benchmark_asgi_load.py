@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent read API calls under WSGI (gunicorn, threads) and ASGI (uvicorn).
+
+Starts a local NSE stub that answers after --nse-delay seconds and points the
+server at it (market data cache TTLs set to 0, so every request waits on the
+upstream call the way a cold or expired cache does). Then, for each server:
+  wsgi:        gunicorn ExpenseTracker.wsgi, --workers x --threads
+  asgi-sync:   uvicorn ExpenseTracker.asgi with ASGI_URLCONF = None (sync views in the thread pool)
+  asgi-async:  uvicorn ExpenseTracker.asgi with the async views
+it sends --requests GETs at each --concurrency level and reports throughput and
+latency percentiles. /api/market-data/ is always tested; pass --rider-id of an
+existing rider in the configured database to add the dashboard, recent transactions,
+funds and portfolio summary endpoints.
+
+Requires gunicorn and uvicorn (servers that are not installed are skipped), and
+httpx for the non-blocking NSE call in the async view.
+Usage: python benchmark_asgi_load.py [--rider-id 48213907] [--concurrency 10,50,200] [--requests 1000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+NSE_SAMPLE = {
+    'marketStatus': 'Open',
+    'data': [
+        {'index': name, 'last': value, 'variation': 12.5, 'percentChange': 0.06,
+         'open': value - 10, 'high': value + 20, 'low': value - 30, 'previousClose': value - 12.5}
+        for name, value in (('NIFTY 50', 22000.0), ('NIFTY 100', 23000.0), ('NIFTY BANK', 48000.0))
+    ],
+}
+RIDER_URLS = ['/api/dashboard/', '/api/transactions/recent/', '/api/funds/', '/api/portfolio/summary/']
+
+SETTINGS_MODULE = '''from ExpenseTracker.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1']
+MARKET_DATA_URL = {url!r}
+MARKET_DATA_TTL = 0
+MARKET_DATA_STALE_TTL = 0
+MARKET_DATA_ERROR_TTL = 0
+ASGI_URLCONF = {asgi_urlconf!r}
+'''
+
+
+class SlowNSEHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        body = json.dumps(NSE_SAMPLE).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_nse(delay):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowNSEHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/api/allIndices'
+
+
+def server_commands(args, port):
+    bind = f'127.0.0.1:{port}'
+    return {
+        'wsgi': ('gunicorn', None, [
+            'gunicorn', 'ExpenseTracker.wsgi:application', '--bind', bind,
+            '--workers', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning',
+        ]),
+        'asgi-sync': ('uvicorn', None, [
+            'uvicorn', 'ExpenseTracker.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log',
+        ]),
+        'asgi-async': ('uvicorn', 'accounts.async_urls', [
+            'uvicorn', 'ExpenseTracker.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log',
+        ]),
+    }
+
+
+def start_server(command, settings_dir, port):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='bench_asgi_settings',
+               PYTHONPATH=os.pathsep.join([settings_dir, os.getcwd(), os.environ.get('PYTHONPATH', '')]))
+    process = subprocess.Popen(command, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{command[0]} exited with {process.returncode}')
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/metrics/', timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{command[0]} did not start on port {port}')
+
+
+def run_level(base_url, urls, concurrency, total, timeout):
+    local = threading.local()
+
+    def one(n):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + urls[n % len(urls)], timeout=timeout).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]  # noqa: E731
+    return total / elapsed, pct(0.5), pct(0.95), pct(0.99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rider-id', help='Existing rider for the database-backed endpoints')
+    parser.add_argument('--concurrency', default='10,50,200', help='Comma-separated client concurrency levels')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per concurrency level')
+    parser.add_argument('--nse-delay', type=float, default=0.5, help='Seconds the NSE stub takes to answer')
+    parser.add_argument('--workers', type=int, default=1, help='Server processes')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=30, help='Client timeout per request')
+    parser.add_argument('--servers', default='wsgi,asgi-sync,asgi-async')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    urls = ['/api/market-data/']
+    if args.rider_id:
+        urls += [f'{url}?rider_id={args.rider_id}' for url in RIDER_URLS]
+    stub, nse_url = start_stub_nse(args.nse_delay)
+    commands = server_commands(args, args.port)
+
+    print(f"🚀 WSGI vs ASGI under load ({args.requests:,} requests per level, NSE answers in {args.nse_delay}s, "
+          f"{args.workers} worker(s), {args.threads} gunicorn threads)")
+    print(f"Endpoints: {', '.join(url.split('?')[0] for url in urls)}")
+    print("=" * 84)
+    print(f"{'server':<11} | {'concurrency':>11} | {'req/s':>8} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'errors':>6}")
+    print("-" * 84)
+    try:
+        for name in args.servers.split(','):
+            program, asgi_urlconf, command = commands[name]
+            if shutil.which(program) is None:
+                print(f"{name:<11} | skipped: {program} is not installed")
+                continue
+            with tempfile.TemporaryDirectory() as settings_dir:
+                with open(os.path.join(settings_dir, 'bench_asgi_settings.py'), 'w') as f:
+                    f.write(SETTINGS_MODULE.format(url=nse_url, asgi_urlconf=asgi_urlconf))
+                process = start_server(command, settings_dir, args.port)
+                try:
+                    for concurrency in levels:
+                        rate, p50, p95, p99, errors = run_level(
+                            f'http://127.0.0.1:{args.port}', urls, concurrency, args.requests, args.timeout,
+                        )
+                        print(f"{name:<11} | {concurrency:>11} | {rate:>8.1f} | {p50 * 1e3:>6.0f}ms | "
+                              f"{p95 * 1e3:>6.0f}ms | {p99 * 1e3:>6.0f}ms | {errors:>6}")
+                finally:
+                    process.terminate()
+                    process.wait()
+    finally:
+        stub.shutdown()
+    print("-" * 84)
+    print("Market data requests that arrive together share one NSE call, so the stub delay is paid per batch.")
+
+
+if __name__ == "__main__":
+    main()
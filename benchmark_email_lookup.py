@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: email lookups with and without the LOWER(email) indexes.
+
+Fills a throwaway test database (created from the configured DATABASES entry,
+like manage.py test does) with --users users and rider rows, then times the
+lookups login, registration and the rider endpoints used to do against the
+ones routed through accounts/email_directory.py, and prints each query plan.
+
+Usage: python benchmark_email_lookup.py [--users 1000000] [--lookups 200] [--keepdb]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExpenseTracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from accounts.email_directory import riders_with_email, users_with_email  # noqa: E402
+from accounts.models import RiderInfo  # noqa: E402
+
+
+BATCH = 5000
+
+
+def populate(count):
+    if User.objects.count() >= count:
+        return
+    password = make_password('benchmark-pass')
+    start = time.perf_counter()
+    for offset in range(0, count, BATCH):
+        users = [
+            User(username=f'bench{n}', email=f'Rider.{n}@Fleet.example', password=password)
+            for n in range(offset, min(offset + BATCH, count))
+        ]
+        User.objects.bulk_create(users)
+        ids = dict(User.objects.filter(username__in=[u.username for u in users]).values_list('username', 'pk'))
+        RiderInfo.objects.bulk_create([
+            RiderInfo(rider_id=f'{int(u.username[5:]):08d}', user_id=ids[u.username], email=u.email, username=u.username)
+            for u in users
+        ])
+        print(f"\r  inserted {min(offset + BATCH, count):,} users", end='', flush=True)
+    print(f"\r  inserted {count:,} users in {time.perf_counter() - start:.0f}s")
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return ' | '.join(' '.join(str(col) for col in row if col is not None) for row in cursor.fetchall())
+
+
+def timed(label, lookup, emails):
+    start = time.perf_counter()
+    for email in emails:
+        lookup(email).first()
+    per_lookup = (time.perf_counter() - start) / len(emails)
+    print(f"  {label:<44} {per_lookup * 1000:>9.2f} ms")
+    print(f"    plan: {explain(lookup(emails[0]))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--keepdb', action='store_true', help='Reuse (and keep) the filled test database')
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        print(f"🚀 Email lookup benchmark ({connection.vendor}, {args.users:,} users)")
+        print("=" * 70)
+        populate(args.users)
+
+        # Mixed case, as typed on a phone keyboard
+        emails = [f'rider.{random.randrange(args.users)}@fleet.EXAMPLE' for _ in range(args.lookups)]
+
+        print("auth_user (login, registration, change email):")
+        timed("before: User email__iexact (LIKE)", lambda e: User.objects.filter(email__iexact=e), emails)
+        timed("after:  users_with_email (LOWER(email) index)", users_with_email, emails)
+        print("accounts_riderinfo (rider by email, verify):")
+        timed("before: RiderInfo email= (no index)", lambda e: RiderInfo.objects.filter(email=e), emails)
+        timed("after:  riders_with_email (LOWER(email) index)", riders_with_email, emails)
+    finally:
+        if not args.keepdb:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
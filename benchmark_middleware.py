@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request middleware overhead of /api/ calls, full stack against the lean one.
+
+Sends --requests GETs through Django's test client to API endpoints that need no
+database (the metrics API and a 400 from the dashboard API), once with the stock
+session/CSRF/auth/messages/X-Frame-Options middleware and once with the Page*
+classes from accounts/middleware.py, with and without browser cookies.
+
+Usage: python benchmark_middleware.py [--requests 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, '.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExpenseTracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+
+FULL_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+URLS = ['/api/metrics/', '/api/dashboard/']
+COOKIES = {'sessionid': 'x' * 32, 'csrftoken': 'y' * 32}
+
+
+def per_request(middleware, url, requests, cookies):
+    with override_settings(MIDDLEWARE=middleware):
+        client = Client()
+        client.cookies.load(cookies)
+        client.get(url)  # load the middleware chain
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(requests // 5):
+                client.get(url)
+            best = min(best, (time.perf_counter() - start) / (requests // 5))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    lean = list(settings.MIDDLEWARE)
+
+    print(f"🚀 Middleware overhead per /api/ request (best of 5 x {args.requests // 5:,} requests)")
+    print("=" * 78)
+    print(f"{'endpoint':<20} | {'cookies':<7} | {'full stack':>10} | {'lean':>10} | {'saved':>10}")
+    print("-" * 78)
+    for url in URLS:
+        for cookies in ({}, COOKIES):
+            full = per_request(FULL_MIDDLEWARE, url, args.requests, cookies)
+            trimmed = per_request(lean, url, args.requests, cookies)
+            print(
+                f"{url:<20} | {'yes' if cookies else 'no':<7} | {full * 1e6:>8.1f}us | "
+                f"{trimmed * 1e6:>8.1f}us | {(full - trimmed) * 1e6:>8.1f}us"
+            )
+    print("-" * 78)
+    print("Timings include the test client and the view itself, which are the same in both columns.")
+
+
+if __name__ == "__main__":
+    main()
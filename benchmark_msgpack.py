@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON vs MessagePack payload size and encode time.
+
+Builds the payloads of funds_list_api, recent_transactions and dashboard_data
+in memory (no database needed), the way the views do for each Accept header,
+and reports raw and gzip sizes plus encode time for both formats.
+
+Requires the msgpack package.
+Usage: python benchmark_msgpack.py [--funds 50] [--repeat 200]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+sys.path.insert(0, '.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExpenseTracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from accounts.renderers import FastJSONRenderer, MessagePackRenderer, msgpack  # noqa: E402
+from accounts.serializers import fast_expense_list, fast_income_list, fast_mutual_fund_list  # noqa: E402
+
+
+def fund_rows(count):
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        (n, f'Fund {n}', 'Equity', Decimal(f'{1000 + n * 37}.50'), Decimal(f'{1100 + n * 41}.25'),
+         start + timedelta(hours=n, microseconds=n))
+        for n in range(count)
+    ]
+
+
+def ledger_rows(label):
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        (n, label, Decimal(f'{250 + n * 13}.75'), date(2025, 1, 1) + timedelta(days=n),
+         'Lunch' if n % 2 else None, start + timedelta(days=n, seconds=n))
+        for n in range(5)
+    ]
+
+
+def payloads(funds, native):
+    recent = (fast_income_list.serialize(ledger_rows('Salary'), native)
+              + fast_expense_list.serialize(ledger_rows('Food'), native))
+    recent.sort(key=lambda x: x['date'], reverse=True)
+    return {
+        'funds_list_api': fast_mutual_fund_list.serialize(fund_rows(funds), native),
+        'recent_transactions': {'transactions': recent},
+        'dashboard_data': {
+            'total_income': Decimal('125000.00'), 'total_expense': Decimal('48210.75'),
+            'total_saving': Decimal('76789.25'), 'balance': Decimal('76789.25'),
+        },
+    }
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--funds', type=int, default=50, help='Funds in the fund list')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if msgpack is None:
+        sys.exit('msgpack is not installed: pip install msgpack')
+
+    json_renderer, msgpack_renderer = FastJSONRenderer(), MessagePackRenderer()
+    as_json, as_msgpack = payloads(args.funds, native=False), payloads(args.funds, native=True)
+
+    print(f"🚀 JSON vs MessagePack ({args.funds} funds, best of {args.repeat})")
+    print("=" * 96)
+    print(f"{'endpoint':<20} | {'JSON bytes':>10} | {'msgpack':>8} | {'JSON gz':>8} | {'msgpack gz':>10} | "
+          f"{'JSON encode':>11} | {'msgpack encode':>14}")
+    print("-" * 96)
+    for name in as_json:
+        json_seconds, json_body = best_of(args.repeat, lambda: json_renderer.render(as_json[name]))
+        msgpack_seconds, msgpack_body = best_of(args.repeat, lambda: msgpack_renderer.render(as_msgpack[name]))
+        print(
+            f"{name:<20} | {len(json_body):>10,} | {len(msgpack_body):>8,} | "
+            f"{len(gzip.compress(json_body)):>8,} | {len(gzip.compress(msgpack_body)):>10,} | "
+            f"{json_seconds * 1e6:>9.1f}us | {msgpack_seconds * 1e6:>12.1f}us"
+        )
+    print("-" * 96)
+    print("Sizes are response bodies; gz columns are what a gzip-enabled proxy would send.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rider_id allocation at high fill ratios.
+
+Compares the old approach (random 8 digits, retried while Profile/RiderInfo
+already have the id - two existence queries per try) with the keyed
+permutation allocator in accounts/rider_ids.py (one counter UPDATE + SELECT,
+whatever the fill ratio).
+
+The random approach is simulated against an in-memory set standing in for
+the database. The space is scaled down (default 10^6) so the set fits in
+memory; the probe counts depend only on the fill ratio, not the space size.
+
+Usage: python benchmark_rider_ids.py [--space 1000000] [--allocations 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+from accounts.rider_ids import permute  # noqa: E402
+
+
+def random_retry(taken, space, allocations):
+    probes = 0
+    start = time.perf_counter()
+    for _ in range(allocations):
+        while True:
+            probes += 1
+            candidate = random.randrange(space)
+            if candidate not in taken:
+                taken.add(candidate)
+                break
+    return probes, time.perf_counter() - start
+
+
+def keyed_permutation(allocations):
+    start = time.perf_counter()
+    for counter in range(allocations):
+        permute(counter, key='benchmark-key')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--space', type=int, default=10 ** 6)
+    parser.add_argument('--allocations', type=int, default=2000)
+    args = parser.parse_args()
+
+    print("🚀 rider_id allocation benchmark")
+    print("=" * 78)
+    print(f"{'fill':>7} | {'old tries/id':>12} | {'old queries/id':>14} | {'new queries/id':>14} | {'new CPU/id':>10}")
+    print("-" * 78)
+
+    for fill in (0.5, 0.9, 0.99, 0.999):
+        taken = set(random.sample(range(args.space), int(args.space * fill)))
+        allocations = min(args.allocations, args.space - len(taken) - 1)
+        probes, _ = random_retry(taken, args.space, allocations)
+        permutation_seconds = keyed_permutation(allocations)
+
+        tries = probes / allocations
+        print(
+            f"{fill:>7.1%} | {tries:>12.1f} | {tries * 2:>14.1f} | {2:>14} | "
+            f"{permutation_seconds / allocations * 1e6:>8.1f}us"
+        )
+
+    print("-" * 78)
+    print("Old: expected tries grow as 1 / (1 - fill); every try is two SELECT ... EXISTS queries,")
+    print("     and two concurrent registrations can still pick the same id.")
+    print("New: constant work per id; uniqueness comes from the permutation being a bijection.")
+
+
+if __name__ == "__main__":
+    main()
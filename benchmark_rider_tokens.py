@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: identifying the rider by rider_id lookup against a signed rider token.
+
+Creates --riders riders in a throwaway test database (created from the configured
+DATABASES entry, like manage.py test does), then times, per request:
+  rider_id, cold:  Profile JOIN User query (rider cache empty)
+  rider_id, warm:  shared cache hit / per-process LRU hit
+  token:           HMAC verification + pk-only User, no query
+and finally GET /api/dashboard/ end to end with ?rider_id= and with the token header.
+
+Usage: python benchmark_rider_tokens.py [--riders 200] [--requests 2000] [--keepdb]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, '.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExpenseTracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from accounts.rider_cache import rider_resolver  # noqa: E402
+from accounts.rider_tokens import issue_rider_token, verify_rider_token  # noqa: E402
+
+
+def create_riders(count):
+    riders = []
+    for n in range(count):
+        user = User.objects.create_user(username=f'bench{n}', email=f'bench{n}@fleet.example', password=None)
+        riders.append((user.pk, user.profile.rider_id))
+    return riders
+
+
+def timed(label, riders, requests, identify):
+    queries = 0
+    start = time.perf_counter()
+    for n in range(requests):
+        reset_queries()
+        identify(*riders[n % len(riders)])
+        queries += len(connection.queries)
+    per_request = (time.perf_counter() - start) / requests
+    print(f"  {label:<40} {per_request * 1e6:>9.1f} us  {queries / requests:>5.2f} queries")
+    return per_request
+
+
+def clear_rider_cache():
+    rider_resolver.clear()
+    cache.clear()
+
+
+def cold_lookup(user_id, rider_id):
+    clear_rider_cache()
+    return rider_resolver.resolve(rider_id)
+
+
+def shared_hit(user_id, rider_id):
+    rider_resolver.clear()
+    return rider_resolver.resolve(rider_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--riders', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--keepdb', action='store_true', help='Reuse (and keep) the test database')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    connection.force_debug_cursor = True  # count queries
+    try:
+        riders = create_riders(args.riders)
+        tokens = {rider_id: issue_rider_token(user_id, rider_id) for user_id, rider_id in riders}
+
+        print(f"🚀 Rider identification ({connection.vendor}, {args.riders} riders, {args.requests:,} requests)")
+        print("=" * 70)
+        cold = timed("rider_id, cache cold (DB query)", riders, args.requests, cold_lookup)
+        timed("rider_id, shared cache hit", riders, args.requests, shared_hit)
+        timed("rider_id, per-process LRU hit", riders, args.requests,
+              lambda user_id, rider_id: rider_resolver.resolve(rider_id))
+        token = timed("token (HMAC verify, no query)", riders, args.requests,
+                      lambda user_id, rider_id: verify_rider_token(tokens[rider_id]).user())
+        print(f"  token vs cold lookup: {cold / token:.0f}x faster")
+
+        print("GET /api/dashboard/ end to end:")
+        client = Client()
+        timed("?rider_id=, rider cache cold", riders, args.requests // 10, lambda user_id, rider_id: (
+            clear_rider_cache(), client.get('/api/dashboard/', {'rider_id': rider_id}),
+        ))
+        timed("?rider_id=, rider cache warm", riders, args.requests // 10, lambda user_id, rider_id: (
+            client.get('/api/dashboard/', {'rider_id': rider_id}),
+        ))
+        timed("Authorization: Rider <token>", riders, args.requests // 10, lambda user_id, rider_id: (
+            client.get('/api/dashboard/', HTTP_AUTHORIZATION=f'Rider {tokens[rider_id]}'),
+        ))
+    finally:
+        connection.force_debug_cursor = False
+        if not args.keepdb:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ModelSerializer(many=True) against the values_list() read path.
+
+Builds --rows mutual fund / income rows in memory (no database needed), then
+times, for each list endpoint serializer:
+  old: model instances -> DRF ModelSerializer(many=True).data -> JSONRenderer
+  new: values_list tuples -> ValuesListSerializer.serialize -> JSONRenderer
+and checks that both produce byte-identical JSON.
+
+Usage: python benchmark_serializers.py [--rows 5000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+sys.path.insert(0, '.')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExpenseTracker.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from accounts.models import Income, MutualFund  # noqa: E402
+from accounts.serializers import (  # noqa: E402
+    IncomeSerializer, MutualFundSerializer, fast_income_list, fast_mutual_fund_list,
+)
+
+
+def make_funds(count):
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        MutualFund(
+            id=n, user_id=1, name=f'Fund {n}', fund_type='Equity',
+            invested_amount=Decimal(f'{1000 + n}.50'), current_value=Decimal(f'{1100 + n}.25'),
+            created_at=start + timedelta(minutes=n, microseconds=n),
+        )
+        for n in range(count)
+    ]
+
+
+def make_incomes(count):
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        Income(
+            id=n, user_id=1, source='Salary', amount=Decimal(f'{n}.00'),
+            date=date(2025, 1, 1) + timedelta(days=n % 365), notes=None if n % 2 else 'bonus',
+            created_at=start + timedelta(seconds=n),
+        )
+        for n in range(count)
+    ]
+
+
+def as_tuples(instances, fast):
+    # What .values_list() would return for these rows
+    return [tuple(getattr(obj, field.source) for field in fast.fields) for obj in instances]
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    renderer = JSONRenderer()
+    cases = [
+        ('funds_list_api', MutualFundSerializer, fast_mutual_fund_list, make_funds(args.rows)),
+        ('recent_transactions', IncomeSerializer, fast_income_list, make_incomes(args.rows)),
+    ]
+
+    print(f"🚀 List serialization benchmark ({args.rows:,} rows, best of {args.repeat})")
+    print("=" * 78)
+    print(f"{'endpoint':<22} | {'ModelSerializer':>15} | {'values_list':>12} | {'speedup':>7} | identical")
+    print("-" * 78)
+    for name, serializer_class, fast, instances in cases:
+        rows = as_tuples(instances, fast)
+        old_seconds, old_json = best_of(
+            args.repeat, lambda: renderer.render(serializer_class(instances, many=True).data)
+        )
+        new_seconds, new_json = best_of(args.repeat, lambda: renderer.render(fast.serialize(rows)))
+        print(
+            f"{name:<22} | {old_seconds * 1000:>12.1f} ms | {new_seconds * 1000:>9.1f} ms | "
+            f"{old_seconds / new_seconds:>6.1f}x | {'yes' if old_json == new_json else 'NO'}"
+        )
+    print("-" * 78)
+    print("Timings exclude the query itself; values_list() also skips building model instances.")
+
+
+if __name__ == "__main__":
+    main()